@@ -0,0 +1,78 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from job_pipeline import Config, JobSiteMatcher
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "search_results.jsonl")
+
+# The matching code as it was before JobSiteMatcher, kept here as the baseline.
+def legacy_is_target(url):
+    return any(site in url for site in Config.TARGET_JOB_SITES)
+
+def legacy_extract_company(title, url):
+    try:
+        parsed_url = urlparse(url); hostname = parsed_url.hostname
+        if not hostname: return None
+        path_parts = parsed_url.path.strip('/').split('/')
+        if 'greenhouse.io' in hostname and len(path_parts) > 0 and path_parts[0] not in ['boards', 'jobs']: return path_parts[0].replace('-', ' ').title()
+        if 'lever.co' in hostname and len(path_parts) > 0 and path_parts[0] not in ['jobs']: return path_parts[0].replace('-', ' ').title()
+    except Exception: pass
+    noise = ["Analyst", "Associate", "Hiring", "Careers", "Jobs", "at", "Inc", "LLC", "Ltd", "Partners", "Group", "Holdings", "Job Application for", "Career Opportunities", "Job Search"]
+    clean_title = title
+    for word in noise: clean_title = re.sub(r'\b' + re.escape(word) + r'\b', '', clean_title, flags=re.IGNORECASE)
+    parts = re.split(r' - | \| | – ', clean_title, 1); company = parts[0].strip(); return company if company else None
+
+def compiled_pipeline(matcher):
+    def run(url, title):
+        site_match = matcher.match(url)
+        return (True, matcher.extract_company(title, site_match)) if site_match else (False, None)
+    return run
+
+def legacy_pipeline(url, title):
+    return (True, legacy_extract_company(title, url)) if legacy_is_target(url) else (False, None)
+
+def same_company(found, expected):
+    squash = lambda name: re.sub(r"[^a-z0-9]", "", (name or "").casefold())
+    return squash(found) == squash(expected)
+
+def score(corpus, run):
+    target_hits = company_hits = 0
+    for record in corpus:
+        is_target, company = run(record['url'], record['title'])
+        target_hits += is_target == record['expected_target']
+        if record['expected_target'] and is_target: company_hits += same_company(company, record['expected_company'])
+    targets = sum(1 for record in corpus if record['expected_target'])
+    return target_hits / len(corpus), company_hits / targets
+
+def throughput(corpus, run, repeat):
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        for record in corpus: run(record['url'], record['title'])
+    elapsed = time.perf_counter() - started_at
+    return repeat * len(corpus) / elapsed, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy and compiled job-site matchers on a recorded corpus of search results.")
+    parser.add_argument("--corpus", default=CORPUS_FILE, help="JSON Lines file with url, title, expected_company and expected_target.")
+    parser.add_argument("--repeat", type=int, default=2000, help="How many times to run over the corpus for the timing.")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding='utf-8') as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+    candidates = [("legacy", legacy_pipeline), ("compiled", compiled_pipeline(JobSiteMatcher(Config.TARGET_JOB_SITES)))]
+
+    print(f"Corpus: {len(corpus)} results ({sum(1 for r in corpus if r['expected_target'])} job postings), {args.repeat} passes\n")
+    print(f"{'matcher':<10} {'results/s':>12} {'total s':>9} {'target acc':>11} {'company acc':>12}")
+    for name, run in candidates:
+        rate, elapsed = throughput(corpus, run, args.repeat)
+        target_accuracy, company_accuracy = score(corpus, run)
+        print(f"{name:<10} {rate:>12,.0f} {elapsed:>9.2f} {target_accuracy:>11.1%} {company_accuracy:>12.1%}")
+
+if __name__ == "__main__":
+    main()
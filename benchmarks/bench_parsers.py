@@ -0,0 +1,51 @@
+import os
+import sys
+import glob
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from job_pipeline import parse_result_page
+from bs4 import BeautifulSoup
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+
+# The BeautifulSoup extraction the pipeline used before parse_result_page, kept here as the baseline.
+def legacy_parse(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    results = []
+    for result in soup.select("article.result"):
+        h3_tag = result.find('h3')
+        if not h3_tag or not (link_tag := h3_tag.find('a')): continue
+        results.append({"url": link_tag.get('href', ''), "title": h3_tag.get_text(strip=True)})
+    return results
+
+def throughput(pages, parse, repeat):
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages.values(): parse(html)
+    elapsed = time.perf_counter() - started_at
+    return repeat * len(pages) / elapsed, repeat * sum(len(html) for html in pages.values()) / elapsed / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SearXNG result-page parsers on saved pages from several instance themes.")
+    parser.add_argument("--pages", default=PAGES_DIR, help="Folder of saved result pages (*.html).")
+    parser.add_argument("--repeat", type=int, default=200, help="How many times to parse every page for the timing.")
+    args = parser.parse_args()
+
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(args.pages, "*.html"))):
+        with open(path, encoding='utf-8') as f: pages[os.path.basename(path)] = f.read()
+
+    print(f"{'page':<32} {'KB':>6} {'legacy':>8} {'stream':>8}")
+    for name, html in pages.items():
+        streamed = parse_result_page(html)
+        print(f"{name:<32} {len(html) / 1024:>6.1f} {len(legacy_parse(html)):>8} {'n/a' if streamed is None else len(streamed):>8}")
+
+    print(f"\n{'parser':<10} {'pages/s':>10} {'MB/s':>8}  ({args.repeat} passes over {len(pages)} pages)")
+    for name, parse in (("legacy", legacy_parse), ("stream", parse_result_page)):
+        pages_per_second, megabytes_per_second = throughput(pages, parse, args.repeat)
+        print(f"{name:<10} {pages_per_second:>10,.0f} {megabytes_per_second:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+import contextlib
+from urllib.parse import urlsplit, urlunsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+try: import resource
+except ImportError: resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from job_pipeline import Config, LiveJobPipeline, parse_result_page
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+RESULT_PAGES = ["simple_theme.html", "simple_theme_page2.html", "oscar_theme.html"]
+STAGES = ["page_load_seconds", "parse_seconds", "dedup_seconds", "llm_seconds", "write_seconds"]
+RESUME_TEXT = """Jordan Example - Finance & Data
+Summary: Finance graduate with two internships in investment banking and equity research.
+Skills: Python, pandas, SQL, financial modeling, DCF and LBO valuation, M&A analysis, Excel, VBA, Bloomberg.
+Experience: Summer Analyst, M&A advisory - built merger models and pitch book comparables.
+Experience: Equity Research Intern - maintained coverage models for 12 fintech and payments companies.
+Education: BSc Finance and Computer Science, minor in Statistics."""
+
+# Stand-in titles are made unique per query and page, so replayed pages look like fresh postings instead of reposts.
+CITIES = ["New York", "London", "Singapore", "Toronto", "Sydney", "Frankfurt", "Hong Kong", "Chicago", "Boston", "Zurich", "Paris", "Dublin"]
+TEAMS = ["Global Markets", "Treasury", "Risk", "Coverage", "Strategy", "Credit", "Macro", "Operations", "Research", "Technology", "Wealth", "Payments"]
+RESULT_LINK = re.compile(r'(<h[34][^>]*><a href=")([^"]+)("[^>]*>)(.*?)(</a></h[34]>)', re.DOTALL)
+
+def load_pages():
+    pages = {}
+    for name in RESULT_PAGES + ["simple_theme_no_results.html", "bot_challenge.html"]:
+        with open(os.path.join(PAGES_DIR, name), encoding='utf-8') as f: pages[name] = f.read()
+    return pages
+
+def replay_page(pages, query, page_num, unique_ratio):
+    # A recorded page picked per (query, page), with most job IDs and titles rewritten so each request yields new postings.
+    salt = zlib.crc32(f"{query}|{page_num}".encode('utf-8'))
+    counter = iter(range(1000))
+
+    def rewrite(match):
+        rng = random.Random(salt * 1000 + next(counter))
+        if rng.random() >= unique_ratio: return match.group(0)
+        offset = rng.randrange(1, 10 ** 6); parts = urlsplit(match.group(2))
+        salted = lambda text: re.sub(r"\d+", lambda digits: str(int(digits.group()) + offset), text)
+        url = urlunsplit((parts.scheme, parts.netloc, salted(parts.path), salted(parts.query), ""))
+        return f"{match.group(1)}{url}{match.group(3)}{match.group(4)} ({rng.choice(TEAMS)}, {rng.choice(CITIES)}) {rng.randrange(10 ** 5, 10 ** 6)}{match.group(5)}"
+    return RESULT_LINK.sub(rewrite, pages[RESULT_PAGES[salt % len(RESULT_PAGES)]])
+
+def fake_searxng_handler(pages, args):
+    class FakeSearxngHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path); params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            if url.path.rstrip('/') != '/search': self.send_error(404); return
+            time.sleep(args.search_latency_ms / 1000 * random.uniform(0.5, 1.5))
+            roll = random.random()
+            if roll < args.rate_limit_rate:
+                self.send_response(429); self.send_header('Retry-After', '1'); self.send_header('Content-Length', '0'); self.end_headers(); return
+            if roll < args.rate_limit_rate + args.failure_rate: self.send_error(503); return
+            if params.get('format') == 'json' and args.format != 'json': self.send_error(403); return
+
+            query, page_num = params.get('q', ''), int(params.get('pageno', 1))
+            if random.random() < args.challenge_rate: html = pages["bot_challenge.html"]
+            elif page_num > args.result_pages: html = pages["simple_theme_no_results.html"]
+            else: html = replay_page(pages, query, page_num, args.unique_ratio)
+            if params.get('format') == 'json':
+                body, content_type = json.dumps({'query': query, 'results': parse_result_page(html) or [], 'unresponsive_engines': []}), 'application/json'
+            else: body, content_type = html, 'text/html; charset=utf-8'
+            body = body.encode('utf-8')
+            self.send_response(200); self.send_header('Content-Type', content_type); self.send_header('Content-Length', str(len(body))); self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+    return FakeSearxngHandler
+
+def fake_verdict(title):
+    # Deterministic per title, so every worker setting sees the same matches.
+    score = zlib.crc32(title.encode('utf-8')) % 10 + 1
+    return {"is_match": score >= 7, "score": score, "reason": "Stand-in verdict from the benchmark's fake Ollama.", "matched_keywords": title.split()[:2]}
+
+def fake_ollama_handler(args):
+    slots = threading.Semaphore(args.ollama_parallel)
+
+    class FakeOllamaHandler(BaseHTTPRequestHandler):
+        def _reply(self, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(200); self.send_header('Content-Type', 'application/json'); self.send_header('Content-Length', str(len(body))); self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip('/') != '/api/tags': self.send_error(404); return
+            self._reply({'models': [{'name': Config.OLLAMA_MODEL, 'model': Config.OLLAMA_MODEL, 'size': 0, 'digest': '0' * 64}]})
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if self.path == '/api/embed':
+                texts = request['input'] if isinstance(request['input'], list) else [request['input']]
+                vectors = [[0.0] * 64 for _ in texts]
+                for vector, text in zip(vectors, texts):
+                    for token in re.findall(r"[a-z0-9&]+", text.casefold()): vector[zlib.crc32(token[:5].encode('utf-8')) % 64] += 1.0
+                self._reply({'model': request.get('model'), 'embeddings': vectors}); return
+            if self.path != '/api/chat': self.send_error(404); return
+
+            prompt = request['messages'][-1]['content']
+            if batch := re.findall(r'^(\d+)\. "(.*)"$', prompt.split("JOB TITLES TO EVALUATE", 1)[-1], re.MULTILINE) if "JOB TITLES TO EVALUATE" in prompt else None:
+                content = {'results': [dict(fake_verdict(title), id=int(index)) for index, title in batch]}
+            else:
+                content = fake_verdict(re.search(r'JOB TITLE TO EVALUATE:\s*"(.*)"', prompt).group(1))
+            content = json.dumps(content)
+            # Roughly 4 characters per token; generation is paced per output token, prompt processing per input token.
+            prompt_tokens, output_tokens = len(prompt) // 4, len(content) // 4
+            with slots: time.sleep((prompt_tokens * args.prompt_token_ms + output_tokens * args.output_token_ms) / 1000)
+            self._reply({'model': request.get('model'), 'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), 'message': {'role': 'assistant', 'content': content},
+                         'done': True, 'done_reason': 'stop', 'prompt_eval_count': prompt_tokens, 'eval_count': output_tokens})
+
+        def log_message(self, format, *args):
+            pass
+    return FakeOllamaHandler
+
+def start_server(handler):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler); server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+def write_resume_pdf(path):
+    import fitz
+    with fitz.open() as doc:
+        doc.new_page().insert_text((72, 72), RESUME_TEXT, fontsize=10); doc.save(path)
+
+def run_one(setting):
+    # Runs in a child process, so peak RSS belongs to this worker setting alone.
+    os.chdir(setting['workdir'])
+    Config.CANDIDATE_PROFILE_PDF = setting['resume']
+    Config.SEARXNG_INSTANCES = setting['instances']; Config.OLLAMA_HOST = setting['ollama_host']
+    Config.ENABLE_BROWSER_FALLBACK = False
+    Config.MAX_SCRAPER_TABS, Config.MAX_LLM_WORKERS = setting['scrapers'], setting['analyzers']
+    Config.MIN_ACTIVE_SCRAPERS = min(Config.MIN_ACTIVE_SCRAPERS, setting['scrapers'])
+    Config.MAX_LLM_WORKERS_CEILING = max(Config.MAX_LLM_WORKERS_CEILING, setting['analyzers'])
+    Config.COUNTRY_PRIORITY = Config.COUNTRY_PRIORITY[:setting['countries']]
+    Config.INSTANCE_REQUESTS_PER_MINUTE, Config.INSTANCE_BURST = setting['instance_rpm'], max(Config.INSTANCE_BURST, setting['instance_rpm'] // 60)
+    Config.CIRCUIT_BREAKER_COOLDOWN = Config.CIRCUIT_BREAKER_MAX_COOLDOWN = setting['cooldown']
+    Config.METRICS_SNAPSHOT_INTERVAL = 5
+
+    started_at = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        pipeline = LiveJobPipeline(mode='fresh'); pipeline.run()
+    elapsed = time.perf_counter() - started_at
+
+    metrics = pipeline.metrics
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    if peak_rss and sys.platform != 'darwin': peak_rss *= 1024
+    jobs = metrics.counter_total('jobs_found_total')
+    return {'scrapers': setting['scrapers'], 'analyzers': setting['analyzers'], 'seconds': round(elapsed, 2), 'jobs': jobs,
+            'jobs_per_minute': round(jobs / elapsed * 60, 1) if elapsed else None,
+            'llm_calls': metrics.counter_total('llm_calls_total'), 'llm_calls_per_job': round(metrics.counter_total('llm_calls_total') / jobs, 3) if jobs else None,
+            'pages': metrics.counter_total('searxng_requests_total', outcome='success'), 'page_failures': metrics.counter_total('searxng_requests_total') - metrics.counter_total('searxng_requests_total', outcome='success'),
+            'stages': {stage: {'p50': metrics.percentile(stage, 0.5), 'p99': metrics.percentile(stage, 0.99)} for stage in STAGES},
+            'peak_rss_mb': round(peak_rss / 2 ** 20, 1) if peak_rss else None}
+
+def parse_settings(text):
+    settings = []
+    for item in text.split(','):
+        scrapers, _, analyzers = item.strip().partition('x')
+        settings.append((int(scrapers), int(analyzers or 1)))
+    return settings
+
+def milliseconds(seconds):
+    return f"{seconds * 1000:.1f}" if seconds is not None else "-"
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark against a local stand-in SearXNG (replaying the saved pages in benchmarks/pages/) and a stand-in Ollama.")
+    parser.add_argument("--settings", default="2x1,4x2,8x2", help="Comma-separated worker settings, each SCRAPERSxANALYZERS.")
+    parser.add_argument("--instances", type=int, default=6, help="How many stand-in SearXNG instances to start.")
+    parser.add_argument("--countries", type=int, default=2, help="Only search the first N countries of COUNTRY_PRIORITY (all JOB_TITLES are searched).")
+    parser.add_argument("--result-pages", type=int, default=3, help="Pages with results per query; the next page is empty.")
+    parser.add_argument("--format", choices=["html", "json"], default="html", help="html answers format=json with 403, like most public instances.")
+    parser.add_argument("--unique-ratio", type=float, default=0.8, help="Share of replayed results rewritten into new postings; the rest repeat as duplicates.")
+    parser.add_argument("--search-latency-ms", type=float, default=80, help="Mean SearXNG response time (uniform +/-50%%).")
+    parser.add_argument("--failure-rate", type=float, default=0.03, help="Share of searches answered with 503.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.02, help="Share of searches answered with 429 and Retry-After.")
+    parser.add_argument("--challenge-rate", type=float, default=0.0, help="Share of searches answered with a bot-challenge page (the instance is then treated as browser-only).")
+    parser.add_argument("--instance-rpm", type=int, default=600, help="INSTANCE_REQUESTS_PER_MINUTE during the benchmark.")
+    parser.add_argument("--cooldown", type=int, default=2, help="Circuit-breaker cool-down (seconds) during the benchmark.")
+    parser.add_argument("--prompt-token-ms", type=float, default=0.05, help="Stand-in Ollama prompt processing time per input token.")
+    parser.add_argument("--output-token-ms", type=float, default=2.0, help="Stand-in Ollama generation time per output token.")
+    parser.add_argument("--ollama-parallel", type=int, default=2, help="Requests the stand-in Ollama serves at once (like OLLAMA_NUM_PARALLEL).")
+    parser.add_argument("--resume", help="Resume PDF to use. Defaults to a generated one-page resume.")
+    parser.add_argument("--timeout", type=int, default=900, help="Seconds before a worker setting is abandoned.")
+    parser.add_argument("--json", help="Also write the full results to this JSON file.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_one(json.loads(args.child)))); return
+
+    pages = load_pages()
+    instances = [start_server(fake_searxng_handler(pages, args)) for _ in range(args.instances)]
+    ollama_server, ollama_host = start_server(fake_ollama_handler(args))
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as workdir:
+        resume = os.path.abspath(args.resume) if args.resume else os.path.join(workdir, "resume.pdf")
+        if not args.resume: write_resume_pdf(resume)
+        print(f"{args.instances} SearXNG stand-ins, {sum(len(titles) for titles in Config.JOB_TITLES.values())} job titles x {args.countries} countries x {args.result_pages} pages, "
+              f"{args.search_latency_ms:.0f} ms search latency, {args.failure_rate:.0%} 503 / {args.rate_limit_rate:.0%} 429, {args.output_token_ms} ms per output token\n")
+        print(f"{'setting':<8} {'seconds':>8} {'jobs':>6} {'jobs/min':>9} {'calls/job':>10} {'page p50/p99 ms':>16} {'llm p50/p99 ms':>16} {'peak RSS MB':>12}")
+        for scrapers, analyzers in parse_settings(args.settings):
+            run_dir = os.path.join(workdir, f"{scrapers}x{analyzers}"); os.makedirs(run_dir)
+            setting = {'workdir': run_dir, 'resume': resume, 'instances': [url for server, url in instances], 'ollama_host': ollama_host, 'scrapers': scrapers, 'analyzers': analyzers,
+                       'countries': args.countries, 'instance_rpm': args.instance_rpm, 'cooldown': args.cooldown}
+            try:
+                child = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", json.dumps(setting)], capture_output=True, text=True, timeout=args.timeout)
+            except subprocess.TimeoutExpired:
+                print(f"{scrapers}x{analyzers:<6} timed out after {args.timeout} s"); continue
+            if child.returncode != 0 or not child.stdout.strip():
+                print(f"{scrapers}x{analyzers:<6} failed:\n{child.stderr.strip()[-2000:]}"); continue
+            row = json.loads(child.stdout.strip().splitlines()[-1]); rows.append(row)
+            page, llm = row['stages']['page_load_seconds'], row['stages']['llm_seconds']
+            print(f"{f'{scrapers}x{analyzers}':<8} {row['seconds']:>8.1f} {row['jobs']:>6} {row['jobs_per_minute'] or 0:>9,.0f} {row['llm_calls_per_job'] or 0:>10.3f} "
+                  f"{milliseconds(page['p50']) + ' / ' + milliseconds(page['p99']):>16} {milliseconds(llm['p50']) + ' / ' + milliseconds(llm['p99']):>16} {row['peak_rss_mb'] or 0:>12.1f}")
+
+    for row in rows:
+        print(f"\n{row['scrapers']}x{row['analyzers']}: {row['pages']} pages fetched, {row['page_failures']} failed requests, {row['llm_calls']} LLM calls")
+        for stage, latency in row['stages'].items(): print(f"  {stage:<20} p50 {milliseconds(latency['p50']):>9} ms   p99 {milliseconds(latency['p99']):>9} ms")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f: json.dump(rows, f, indent=2)
+    for server, url in instances + [(ollama_server, ollama_host)]: server.shutdown()
+
+if __name__ == "__main__":
+    main()
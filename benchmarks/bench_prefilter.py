@@ -0,0 +1,69 @@
+import os
+import re
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from job_pipeline import Config, RelevanceRanker
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "prefilter_titles.jsonl")
+# The same one-page resume bench_pipeline.py feeds the pipeline.
+RESUME_TEXT = """Jordan Example - Finance & Data
+Summary: Finance graduate with two internships in investment banking and equity research.
+Skills: Python, pandas, SQL, financial modeling, DCF and LBO valuation, M&A analysis, Excel, VBA, Bloomberg.
+Experience: Summer Analyst, M&A advisory - built merger models and pitch book comparables.
+Experience: Equity Research Intern - maintained coverage models for 12 fintech and payments companies.
+Education: BSc Finance and Computer Science, minor in Statistics."""
+
+# The pre-filter as it was before titles were stripped of board text: raw result titles, tokens cut to 5 characters, plain cosine.
+class LegacyRanker(RelevanceRanker):
+    def _tokenize(self, text):
+        return [token[:5] for token in re.findall(r"[a-z0-9&+#]+", text.casefold()) if token not in self.STOPWORDS]
+
+    def score(self, title, company=None):
+        vector = self._vector(title)
+        if not vector: return 0.0, Config.PREFILTER_MIN_SCORE
+        title_similarity = max((sum(weight * target.get(token, 0.0) for token, weight in vector.items()) for target in self.title_vectors), default=0.0)
+        resume_coverage = sum(weight for token, weight in vector.items() if token in self.resume_terms) / sum(vector.values())
+        return 0.6 * title_similarity + 0.4 * resume_coverage, Config.PREFILTER_MIN_SCORE
+
+def evaluate(ranker, corpus, threshold):
+    scored = [(ranker.score(record['title'], record['company'])[0], record['relevant']) for record in corpus]
+    relevant = [score for score, is_relevant in scored if is_relevant]
+    irrelevant = [score for score, is_relevant in scored if not is_relevant]
+    # Share of (relevant, irrelevant) pairs ranked the right way round, i.e. how well "most promising first" orders the queue.
+    ordering = sum((a > b) + 0.5 * (a == b) for a in relevant for b in irrelevant) / (len(relevant) * len(irrelevant))
+    kept = sum(score >= threshold for score in relevant) / len(relevant)
+    rejected = sum(score < threshold for score in irrelevant) / len(irrelevant)
+    return ordering, kept, rejected, scored
+
+def main():
+    parser = argparse.ArgumentParser(description="Score the TF-IDF pre-filter on a labelled set of result titles against the benchmark resume and JOB_TITLES.")
+    parser.add_argument("--corpus", default=CORPUS_FILE, help="JSON Lines file with title, company and relevant.")
+    parser.add_argument("--sweep", action="store_true", help="Also print kept/rejected shares for a range of thresholds.")
+    parser.add_argument("--show", action="store_true", help="Print every title with its score, best first.")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding='utf-8') as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+    Config.PREFILTER_EMBED_MODEL = None
+    rankers = [("legacy", LegacyRanker(RESUME_TEXT, Config.JOB_TITLES)), ("current", RelevanceRanker(RESUME_TEXT, Config.JOB_TITLES))]
+
+    print(f"Corpus: {len(corpus)} titles ({sum(1 for r in corpus if r['relevant'])} relevant), threshold {Config.PREFILTER_MIN_SCORE}\n")
+    print(f"{'ranker':<8} {'ordering':>9} {'relevant kept':>14} {'misses rejected':>16}")
+    for name, ranker in rankers:
+        ordering, kept, rejected, scored = evaluate(ranker, corpus, Config.PREFILTER_MIN_SCORE)
+        print(f"{name:<8} {ordering:>9.1%} {kept:>14.1%} {rejected:>16.1%}")
+    if args.sweep:
+        print(f"\n{'threshold':>9} {'relevant kept':>14} {'misses rejected':>16}")
+        for threshold in [step / 100 for step in range(5, 45, 5)]:
+            ordering, kept, rejected, scored = evaluate(rankers[-1][1], corpus, threshold)
+            print(f"{threshold:>9.2f} {kept:>14.1%} {rejected:>16.1%}")
+    if args.show:
+        print()
+        for (score, is_relevant), record in sorted(zip(evaluate(rankers[-1][1], corpus, 0)[3], corpus), key=lambda item: -item[0][0]):
+            print(f"{score:6.3f} {'+' if is_relevant else '-'} {record['title']}")
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,41 @@ import csv
 import random
 import re
 import time
-from urllib.parse import urlparse, quote_plus
+from urllib.parse import urlparse, quote_plus, parse_qs, urlencode
+import math
+import itertools
 import threading
-from queue import Queue, Empty
-from collections import deque
+from functools import lru_cache
+from queue import Queue, PriorityQueue, Empty
+from collections import deque, OrderedDict
+from contextlib import contextmanager
 import sys
 import json
+import argparse
+import hashlib
+import sqlite3
 import fitz
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests
+from requests.adapters import HTTPAdapter
 
 import ollama
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
 from colorama import init, Fore, Style
 
 class Config:
@@ -31,6 +47,8 @@ class Config:
     
     # The Ollama model to use for analysis. Make sure you have this model pulled.
     OLLAMA_MODEL = "deepseek-r1:8b"
+    # Ollama server URL. None uses the OLLAMA_HOST environment variable, or http://localhost:11434.
+    OLLAMA_HOST = None
 
     # Define your target job titles, categorized by preference.
     JOB_TITLES = {
@@ -42,15 +60,81 @@ class Config:
     # Define your target countries in order of priority.
     COUNTRY_PRIORITY = ["USA", "Singapore", "Canada", "Australia", "United Kingdom", "Germany", "Hong Kong"]
 
+    # Multi-profile mode: match every scraped job against several resumes in one scrape pass. Each profile is a dict with "name" and "pdf",
+    # plus optional "job_titles" and "country_priority" (default: JOB_TITLES and COUNTRY_PRIORITY above). The union of all profiles' searches
+    # runs once, and each job goes to every profile that searched for it. Outputs and verdict caches get the profile name appended.
+    # None runs a single profile from CANDIDATE_PROFILE_PDF, JOB_TITLES and COUNTRY_PRIORITY with the plain file names.
+    PROFILES = None
+    # e.g. PROFILES = [{"name": "alice", "pdf": "alice_resume.pdf"},
+    #                  {"name": "bob", "pdf": "bob_resume.pdf", "job_titles": {"Tier 1": ["Data Engineer"]}, "country_priority": ["Germany"]}]
+    # Text extracted from each resume PDF is cached here, keyed by the PDF's SHA-256, so unchanged PDFs are not parsed again.
+    PROFILE_CACHE_DIR = ".profile_cache"
+
     # --- PERFORMANCE & BEHAVIOR ---
-    # Number of concurrent browser tabs for scraping.
+    # Number of concurrent scraper workers. Each worker leases its own isolated headless Chrome session.
     MAX_SCRAPER_TABS = 8
+    # Total memory budget (MB) for all Chrome sessions. The pool never runs more sessions than fit in this budget.
+    DRIVER_MEMORY_BUDGET_MB = 3200
+    # Rough resident size (MB) of one headless Chrome session, used to size the pool against the budget.
+    DRIVER_ESTIMATED_MB = 300
+    # Hard cap on the V8 heap of each session (MB). Sessions whose JS heap grows past 80% of it are recycled.
+    DRIVER_MAX_HEAP_MB = 256
+    # Restart a Chrome session after this many page loads to keep leaks in check.
+    DRIVER_RECYCLE_AFTER_PAGES = 40
+    # Seconds before a page load is abandoned.
+    PAGE_LOAD_TIMEOUT = 30
+    # Result pages are fetched over plain HTTP (JSON API first, then HTML). Chrome is only used for instances that need JS.
+    ENABLE_BROWSER_FALLBACK = True
+    # Seconds before an HTTP request to a SearXNG instance is abandoned.
+    HTTP_TIMEOUT = 10
+    # Each SearXNG host gets a token bucket: sustained requests per minute, and how many may be sent back to back.
+    INSTANCE_REQUESTS_PER_MINUTE = 6
+    INSTANCE_BURST = 2
+    # Consecutive failures before a host's circuit opens, and the initial cool-down (seconds, doubles on every re-open).
+    CIRCUIT_BREAKER_FAILURES = 2
+    CIRCUIT_BREAKER_COOLDOWN = 120
+    CIRCUIT_BREAKER_MAX_COOLDOWN = 1800
+    # How many different hosts a single results page is tried on before it is given up.
+    MAX_PAGE_ATTEMPTS = 4
+    # User agent sent with HTTP searches. Many instances reject obvious bot user agents.
+    HTTP_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36"
     # Number of concurrent LLM workers for analysis.
     MAX_LLM_WORKERS = 2
+    # Each LLM call scores up to this many job titles, so the resume is only sent once per batch.
+    LLM_BATCH_SIZE = 8
+    # How long (ms) a worker waits for more queued jobs before sending a partial batch.
+    LLM_BATCH_MAX_WAIT_MS = 1500
+    # On-disk cache of LLM verdicts. Entries are tied to the resume, OLLAMA_MODEL and prompt version, so changing any of them invalidates the cache.
+    LLM_CACHE_FILE = "llm_verdict_cache.sqlite3"
+    # How many verdicts are also kept in memory in front of the on-disk cache.
+    LLM_CACHE_MEMORY_ENTRIES = 5000
+    # Jobs scoring below this TF-IDF relevance (0-1) against your resume and JOB_TITLES are rejected without calling the LLM; the rest reach the LLM best-first.
+    # Tuned on benchmarks/corpus/prefilter_titles.jsonl; run benchmarks/bench_prefilter.py --sweep after changing JOB_TITLES or the resume.
+    PREFILTER_MIN_SCORE = 0.1
+    # Optional Ollama embedding model (e.g. "nomic-embed-text") for the pre-filter. None uses a local TF-IDF model.
+    PREFILTER_EMBED_MODEL = None
+    # Embedding scores run higher, so they get their own threshold. If embeddings fail mid-run the pre-filter switches to TF-IDF and PREFILTER_MIN_SCORE.
+    PREFILTER_EMBED_MIN_SCORE = 0.5
     # How many pages of search results to go through for each query.
     MAX_PAGES_PER_QUERY = 10
+    # Search scheduling: lower priority values run first. Every results page is its own task, so with these weights
+    # page 1 of every query runs before page 2 of any query, and Tier 1 / the first countries lead within a page.
+    PAGE_PRIORITY_WEIGHT = 100
+    TIER_PRIORITY_WEIGHTS = {"Tier 1": 0, "Tier 2": 20, "Tier 3": 40}
+    COUNTRY_PRIORITY_WEIGHT = 5
+    # Backpressure: scrapers stop taking new searches while this many jobs wait for the LLM.
+    ANALYSIS_QUEUE_MAX_SIZE = 200
+    # Rebalancing: above the high-water mark scrapers are parked one at a time and analyzers are added (up to MAX_LLM_WORKERS_CEILING,
+    # keep it within Ollama's OLLAMA_NUM_PARALLEL); below the low-water mark the extra analyzers retire and scrapers come back.
+    ANALYSIS_QUEUE_HIGH_WATER = 40
+    ANALYSIS_QUEUE_LOW_WATER = 10
+    MIN_ACTIVE_SCRAPERS = 2
+    MAX_LLM_WORKERS_CEILING = 4
+    REBALANCE_INTERVAL = 5
     # How often the terminal UI refreshes (in seconds).
     UI_REFRESH_RATE = 1
+    # On shutdown (including Ctrl+C), how long to wait for workers to finish their current page or LLM call before the stores are closed.
+    SHUTDOWN_GRACE_SECONDS = 10
 
     # --- TARGETING ---
     # Public SearXNG instances for privacy-respecting searches. List is randomized.
@@ -72,52 +156,1035 @@ class Config:
         "https://search.librenode.com/"
     ])))
     
-    # Target job sites (ATS domains). Only links containing these strings will be processed.
+    # Target job sites (ATS domains, optionally with a path prefix). Only links on these hosts (or their subdomains) will be processed.
     TARGET_JOB_SITES = [
-        "boards.greenhouse.io", "jobs.lever.co", "myworkdayjobs.com", "icims.com", "workable.com",
-        "smartrecruiters.com", "taleo.net", "ultipro.com", "bamboohr.com/jobs", "linkedin.com/jobs/view"
+        "boards.greenhouse.io", "job-boards.greenhouse.io", "job-boards.eu.greenhouse.io", "jobs.lever.co", "myworkdayjobs.com",
+        "icims.com", "workable.com", "smartrecruiters.com", "taleo.net", "ultipro.com", "bamboohr.com/jobs", "linkedin.com/jobs/view"
     ]
 
+    # Postings with the same company and a title at least this similar (estimated Jaccard over character shingles) are treated as reposts.
+    NEAR_DUPLICATE_THRESHOLD = 0.8
+
     # --- OUTPUT FILES ---
     UNFILTERED_OUTPUT_FILE = "company_list_unfiltered.csv"
     FILTERED_OUTPUT_FILE = "company_list_filtered.csv"
     LLM_ANALYSIS_LOG_FILE = "llm_analysis_log.csv"
+    # Also write every output as JSON Lines (live, next to each CSV) and Parquet (exported at the end of the run, needs pyarrow).
+    WRITE_JSONL_OUTPUT = False
+    WRITE_PARQUET_OUTPUT = False
+    # The output writer thread flushes to disk after this many rows or this many seconds, whichever comes first.
+    OUTPUT_FLUSH_ROWS = 50
+    OUTPUT_FLUSH_SECONDS = 2.0
+    # --- METRICS ---
+    # Serve Prometheus text metrics on http://localhost:<port>/metrics while the pipeline runs. None disables the endpoint.
+    METRICS_PORT = None
+    # Append a JSON snapshot of all metrics to this file every METRICS_SNAPSHOT_INTERVAL seconds. None disables snapshots.
+    METRICS_SNAPSHOT_FILE = "pipeline_metrics.jsonl"
+    METRICS_SNAPSHOT_INTERVAL = 30
+    # Write one trace line per job (search -> found -> queued -> analyzed -> written, with timestamps) to TRACE_FILE.
+    ENABLE_JOB_TRACES = False
+    TRACE_FILE = "job_traces.jsonl"
+
+    # Durable run state (search cursors, seen URLs, pending and finished analyses). The CSVs above are exported from it at the end of every run.
+    STATE_DB_FILE = "pipeline_state.sqlite3"
+    # In --incremental mode, search tasks finished less than this many hours ago are not searched again.
+    INCREMENTAL_TASK_MAX_AGE_HOURS = 20
+
+# Bump whenever the LLM prompts or the verdict format change, so cached verdicts from older prompts are dropped.
+LLM_PROMPT_VERSION = 2
+
+def validated_verdict(verdict):
+    # Returns a clean copy of a model verdict, or None if it lacks the shape the outputs rely on (such answers are retried, never stored).
+    if not isinstance(verdict, dict) or not isinstance(verdict.get('is_match'), bool): return None
+    score = verdict.get('score')
+    if isinstance(score, str) and score.strip().isdigit(): score = int(score)
+    if isinstance(score, float) and score.is_integer(): score = int(score)
+    if not isinstance(score, int) or isinstance(score, bool) or not 0 <= score <= 10: return None
+    keywords = verdict.get('matched_keywords', [])
+    if not isinstance(keywords, list) or not all(isinstance(keyword, str) for keyword in keywords): return None
+    reason = verdict.get('reason', '')
+    if not isinstance(reason, str): return None
+    return {'is_match': verdict['is_match'], 'score': score, 'reason': reason, 'matched_keywords': keywords}
+
+class CandidateProfile:
+    # One candidate: resume, search targets, and (once the pipeline starts) its resume text, verdict cache and relevance model.
+    def __init__(self, name, pdf, job_titles, country_priority):
+        self.name = name or "default"
+        self.pdf, self.job_titles, self.country_priority = pdf, job_titles, country_priority
+        self.file_suffix = "_" + re.sub(r"[^\w-]+", "_", name) if name else ""
+        self.summary = self.verdict_cache = self.relevance_ranker = None
+
+    def output_file(self, filename):
+        base, extension = os.path.splitext(filename)
+        return f"{base}{self.file_suffix}{extension}"
+
+    def search_tasks(self):
+        return [(f'"{title}" "{country}"', country, tier) for tier, titles in self.job_titles.items() for title in titles for country in self.country_priority]
+
+def configured_profiles():
+    if not Config.PROFILES: return [CandidateProfile(None, Config.CANDIDATE_PROFILE_PDF, Config.JOB_TITLES, Config.COUNTRY_PRIORITY)]
+    profiles = [CandidateProfile(profile['name'], profile['pdf'], profile.get('job_titles', Config.JOB_TITLES), profile.get('country_priority', Config.COUNTRY_PRIORITY)) for profile in Config.PROFILES]
+    if len({profile.file_suffix for profile in profiles}) != len(profiles): raise ValueError("Config.PROFILES needs a distinct name for every profile.")
+    return profiles
+
+def load_resume_text(pdf_path):
+    # Cached by the PDF's content hash, so fitz only parses a resume again after the file changes.
+    with open(pdf_path, 'rb') as f: pdf_bytes = f.read()
+    cache_path = os.path.join(Config.PROFILE_CACHE_DIR, hashlib.sha256(pdf_bytes).hexdigest() + ".txt")
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding='utf-8') as f: return f.read()
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        text = "".join(page.get_text() for page in doc)
+    os.makedirs(Config.PROFILE_CACHE_DIR, exist_ok=True)
+    with open(cache_path + ".tmp", 'w', encoding='utf-8') as f: f.write(text)
+    os.replace(cache_path + ".tmp", cache_path)
+    return text
+
+class VerdictCache:
+    def __init__(self, path, candidate_summary, model):
+        self.resume_hash = hashlib.sha256(candidate_summary.encode('utf-8')).hexdigest()
+        self.model = model
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.in_flight = {}
+        self.closed = False
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS llm_verdicts (resume_hash TEXT, model TEXT, prompt_version INTEGER, title_key TEXT, verdict TEXT, created_at REAL, PRIMARY KEY (resume_hash, model, prompt_version, title_key))")
+            self.conn.execute("DELETE FROM llm_verdicts WHERE resume_hash != ? OR model != ? OR prompt_version != ?", (self.resume_hash, self.model, LLM_PROMPT_VERSION))
+
+    @staticmethod
+    def normalize_title(title):
+        return " ".join(re.sub(r"[^\w&+#]+", " ", title.casefold()).split())
+
+    def _lookup(self, title_key):
+        if title_key in self.memory:
+            self.memory.move_to_end(title_key); return self.memory[title_key]
+        if self.closed: return None
+        row = self.conn.execute("SELECT verdict FROM llm_verdicts WHERE resume_hash = ? AND model = ? AND prompt_version = ? AND title_key = ?", (self.resume_hash, self.model, LLM_PROMPT_VERSION, title_key)).fetchone()
+        if not row or (verdict := validated_verdict(json.loads(row[0]))) is None: return None
+        self._remember(title_key, verdict); return self.memory[title_key]
+
+    def _remember(self, title_key, verdict):
+        self.memory[title_key] = verdict; self.memory.move_to_end(title_key)
+        while len(self.memory) > Config.LLM_CACHE_MEMORY_ENTRIES: self.memory.popitem(last=False)
+
+    def claim(self, job_data):
+        # Returns ('hit', verdict), ('leader', None) if this job should be sent to the LLM, or ('follower', None) if the same title is already being evaluated.
+        title_key = self.normalize_title(job_data['title'])
+        with self.lock:
+            if job_data.get('llm_cache_leader'): return 'leader', None
+            if (verdict := self._lookup(title_key)) is not None: return 'hit', verdict
+            if title_key in self.in_flight:
+                self.in_flight[title_key].append(job_data); return 'follower', None
+            self.in_flight[title_key] = []; job_data['llm_cache_leader'] = True
+            return 'leader', None
+
+    def resolve(self, job_data, verdict):
+        # Stores the leader's verdict (if any) and hands back the jobs that were waiting on the same title.
+        title_key = self.normalize_title(job_data['title'])
+        with self.lock:
+            job_data.pop('llm_cache_leader', None)
+            if verdict is not None:
+                self._remember(title_key, verdict)
+                if self.closed: return self.in_flight.pop(title_key, [])
+                with self.conn:
+                    self.conn.execute("INSERT OR REPLACE INTO llm_verdicts VALUES (?, ?, ?, ?, ?, ?)", (self.resume_hash, self.model, LLM_PROMPT_VERSION, title_key, json.dumps(verdict), time.time()))
+            return self.in_flight.pop(title_key, [])
+
+    def close(self):
+        with self.lock: self.conn.close(); self.closed = True
+
+class StateStore:
+    # Writes after close() are dropped: workers that outlive the shutdown grace period must not crash on a closed database.
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.closed = False
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL"); self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS search_tasks (query TEXT, country TEXT, tier TEXT, next_page INTEGER, status TEXT, updated_at REAL, PRIMARY KEY (query, country))")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS seen_urls (url TEXT PRIMARY KEY, first_seen_at REAL)")
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")]
+            if columns and 'profile' not in columns:
+                # State files from before multi-profile mode: every job belonged to the single default profile.
+                self.conn.execute("ALTER TABLE jobs RENAME TO jobs_single_profile")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS jobs (url TEXT, profile TEXT, payload TEXT, status TEXT, verdict TEXT, created_at REAL, analyzed_at REAL, PRIMARY KEY (url, profile))")
+            if columns and 'profile' not in columns:
+                self.conn.execute("INSERT INTO jobs SELECT url, 'default', payload, status, verdict, created_at, analyzed_at FROM jobs_single_profile ORDER BY rowid")
+                self.conn.execute("DROP TABLE jobs_single_profile")
+
+    def reset(self):
+        with self.lock, self.conn:
+            for table in ("search_tasks", "seen_urls", "jobs"): self.conn.execute(f"DELETE FROM {table}")
+
+    def register_tasks(self, tasks):
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO search_tasks VALUES (?, ?, ?, 1, 'pending', ?)", [(query, country, tier, time.time()) for query, country, tier in tasks])
+
+    def reopen_stale_tasks(self, max_age_hours):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE search_tasks SET status = 'pending', next_page = 1 WHERE status = 'done' AND updated_at < ?", (time.time() - max_age_hours * 3600,))
+
+    def pending_tasks(self):
+        with self.lock:
+            return self.conn.execute("SELECT query, country, tier, next_page FROM search_tasks WHERE status = 'pending'").fetchall()
+
+    def update_task(self, query, country, next_page, done=False):
+        with self.lock:
+            if self.closed: return
+            with self.conn:
+                self.conn.execute("UPDATE search_tasks SET next_page = ?, status = ?, updated_at = ? WHERE query = ? AND country = ?", (next_page, 'done' if done else 'pending', time.time(), query, country))
+
+    def seen_urls(self):
+        with self.lock:
+            return {row[0] for row in self.conn.execute("SELECT url FROM seen_urls")}
+
+    def add_seen_urls(self, urls):
+        # Stores raw URLs together with their canonical job keys, so both survive into --resume and --incremental runs.
+        with self.lock:
+            if self.closed: return
+            with self.conn:
+                self.conn.executemany("INSERT OR IGNORE INTO seen_urls VALUES (?, ?)", [(url, time.time()) for url in urls])
+
+    def add_job(self, job_data):
+        with self.lock:
+            if self.closed: return
+            with self.conn:
+                self.conn.execute("INSERT OR IGNORE INTO jobs VALUES (?, ?, ?, 'pending', NULL, ?, NULL)", (job_data['url'], job_data['profile'], json.dumps(job_data), time.time()))
+
+    def record_verdict(self, job_data, verdict):
+        with self.lock:
+            if self.closed: return
+            with self.conn:
+                self.conn.execute("UPDATE jobs SET status = ?, verdict = ?, analyzed_at = ? WHERE url = ? AND profile = ?", ('analyzed' if verdict else 'failed', json.dumps(verdict), time.time(), job_data['url'], job_data['profile']))
+
+    def unfinished_jobs(self):
+        # Jobs that were scraped but never got a verdict, including failed LLM calls, in the order they were found.
+        with self.lock:
+            return [dict(json.loads(payload), profile=profile) for payload, profile in self.conn.execute("SELECT payload, profile FROM jobs WHERE status != 'analyzed' ORDER BY rowid")]
+
+    def iter_jobs(self, profile=None):
+        # Every profile's jobs unless a profile name is given.
+        with self.lock:
+            rows = self.conn.execute("SELECT payload, profile, status, verdict FROM jobs WHERE ? IS NULL OR profile = ? ORDER BY rowid", (profile, profile)).fetchall()
+        return [(dict(json.loads(payload), profile=profile), status, json.loads(verdict) if verdict else None) for payload, profile, status, verdict in rows]
+
+    def close(self):
+        with self.lock: self.conn.close(); self.closed = True
+
+OUTPUT_HEADERS = {
+    'filtered': ["score", "reason", "Job Title", "Company Name", "Source Link", "Country", "Tier", "matched_keywords"],
+    'unfiltered': ["Job Title", "Company Name", "Source Link", "Country", "Tier"],
+    'llm_log': ["is_match", "score", "reason", "matched_keywords", "Job Title", "Company Name", "Source Link", "Country", "Tier"]
+}
+
+def unfiltered_row(job_data):
+    return [job_data.get('title'), job_data.get('company'), job_data.get('url'), job_data.get('country'), job_data.get('tier')]
+
+def keyword_list(value):
+    # matched_keywords straight from a model or an older state file is not always a list of strings; output rows must never fail on it.
+    if isinstance(value, str): return [value] if value else []
+    if isinstance(value, (list, tuple)): return [str(keyword) for keyword in value if keyword is not None]
+    return []
+
+def filtered_row(job_data, llm_result):
+    return [llm_result.get('score'), llm_result.get('reason'), job_data.get('title'), job_data.get('company'), job_data.get('url'), job_data.get('country'), job_data.get('tier'), ', '.join(keyword_list(llm_result.get('matched_keywords')))]
+
+def llm_log_row(job_data, llm_result):
+    if not llm_result:
+        return ['LLM_PROCESS_FAILURE', 'N/A', 'N/A', 'N/A', job_data.get('title'), job_data.get('company'), job_data.get('url'), job_data.get('country'), job_data.get('tier')]
+    return [llm_result.get('is_match', 'ERROR'), llm_result.get('score', 'ERROR'), llm_result.get('reason', 'ERROR'), ', '.join(keyword_list(llm_result.get('matched_keywords'))),
+            job_data.get('title'), job_data.get('company'), job_data.get('url'), job_data.get('country'), job_data.get('tier')]
+
+class Metrics:
+    # In-process metrics registry: labelled counters, gauges and latency histograms, exported as Prometheus text or JSON snapshots.
+    LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+    MAX_SAMPLES = 10000
 
-class LiveJobPipeline:
     def __init__(self):
-        self.file_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def increment(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self.lock: self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock: self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets': [0] * len(self.LATENCY_BUCKETS), 'sum': 0.0, 'count': 0, 'samples': deque(maxlen=self.MAX_SAMPLES)}
+            for index, bound in enumerate(self.LATENCY_BUCKETS):
+                if seconds <= bound: histogram['buckets'][index] += 1
+            histogram['sum'] += seconds; histogram['count'] += 1; histogram['samples'].append(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started_at = time.perf_counter()
+        try: yield
+        finally: self.observe(name, time.perf_counter() - started_at, **labels)
+
+    def percentile(self, name, quantile, **labels):
+        # Over every label set of the histogram that carries the given labels. Uses the most recent MAX_SAMPLES observations per label set.
+        with self.lock:
+            samples = sorted(itertools.chain.from_iterable(histogram['samples'] for (metric, metric_labels), histogram in self.histograms.items()
+                                                           if metric == name and all((key, str(value)) in metric_labels for key, value in labels.items())))
+        return samples[min(len(samples) - 1, int(quantile * len(samples)))] if samples else None
+
+    def counter_total(self, name, **labels):
+        with self.lock:
+            return sum(value for (metric, metric_labels), value in self.counters.items() if metric == name and all((key, str(value)) in metric_labels for key, value in labels.items()))
+
+    @staticmethod
+    def _labels_text(labels, extra=()):
+        labels = list(labels) + list(extra)
+        if not labels: return ""
+        return "{" + ",".join(f'{key}="{value}"'.replace("\n", " ") for key, value in labels) + "}"
+
+    def prometheus_text(self):
+        lines = []
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(f"jobpipeline_{name}{self._labels_text(labels)} {value}")
+            for (name, labels), value in sorted(self.gauges.items()):
+                lines.append(f"jobpipeline_{name}{self._labels_text(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                for bound, count in zip(self.LATENCY_BUCKETS, histogram['buckets']):
+                    lines.append(f"jobpipeline_{name}_bucket{self._labels_text(labels, [('le', bound)])} {count}")
+                lines.append(f"jobpipeline_{name}_bucket{self._labels_text(labels, [('le', '+Inf')])} {histogram['count']}")
+                lines.append(f"jobpipeline_{name}_sum{self._labels_text(labels)} {histogram['sum']:.6f}")
+                lines.append(f"jobpipeline_{name}_count{self._labels_text(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        with self.lock:
+            histograms = {}
+            for (name, labels), histogram in self.histograms.items():
+                samples = sorted(histogram['samples'])
+                histograms.setdefault(name, []).append({'labels': dict(labels), 'count': histogram['count'], 'sum': round(histogram['sum'], 6),
+                                                        'p50': samples[len(samples) // 2], 'p99': samples[min(len(samples) - 1, int(0.99 * len(samples)))]})
+            return {'timestamp': time.time(), 'uptime_seconds': round(time.time() - self.started_at, 3),
+                    'counters': [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in self.counters.items()],
+                    'gauges': [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in self.gauges.items()],
+                    'histograms': histograms}
+
+    def summary_lines(self):
+        lines = [f"{'stage':<20} {'count':>8} {'p50':>9} {'p99':>9} {'total s':>10}"]
+        with self.lock: stages = sorted({name for name, labels in self.histograms})
+        for name in stages:
+            with self.lock: matching = [histogram for (metric, labels), histogram in self.histograms.items() if metric == name]
+            count = sum(histogram['count'] for histogram in matching); total = sum(histogram['sum'] for histogram in matching)
+            lines.append(f"{name:<20} {count:>8} {self.percentile(name, 0.5):>8.3f}s {self.percentile(name, 0.99):>8.3f}s {total:>10.1f}")
+        with self.lock:
+            hosts = {}
+            for (name, labels), value in self.counters.items():
+                if name != 'searxng_requests_total': continue
+                labels = dict(labels); hosts.setdefault(labels['host'], {}).setdefault(labels['outcome'], 0); hosts[labels['host']][labels['outcome']] += value
+        worst_hosts = sorted(hosts.items(), key=lambda item: -sum(count for outcome, count in item[1].items() if outcome != 'success'))[:5]
+        if worst_hosts:
+            page_load = lambda host: f", p50 {p50 * 1000:.0f} ms" if (p50 := self.percentile('page_load_seconds', 0.5, host=host)) is not None else ""
+            lines.append("Least reliable SearXNG hosts: " + ", ".join(f"{host} ({outcomes.get('success', 0)} ok / {sum(outcomes.values()) - outcomes.get('success', 0)} failed{page_load(host)})" for host, outcomes in worst_hosts))
+        llm_calls = self.counter_total('llm_calls_total')
+        if llm_calls:
+            lines.append(f"LLM: {llm_calls} calls for {self.counter_total('llm_jobs_total')} jobs, {self.counter_total('llm_prompt_tokens_total')} prompt / {self.counter_total('llm_output_tokens_total')} output tokens")
+        return lines
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    metrics = None
+
+    def do_GET(self):
+        if self.path.rstrip('/') != '/metrics':
+            self.send_error(404); return
+        body = self.metrics.prometheus_text().encode('utf-8')
+        self.send_response(200); self.send_header('Content-Type', 'text/plain; version=0.0.4'); self.send_header('Content-Length', str(len(body))); self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+JOB_FIELDS = ["title", "company", "url", "country", "tier"]
+
+def result_record(job_data, llm_result=None):
+    record = {field: job_data.get(field) for field in JOB_FIELDS}
+    if llm_result is not None:
+        try: score = int(llm_result.get('score'))
+        except (TypeError, ValueError): score = None
+        record.update({'is_match': llm_result.get('is_match'), 'score': score, 'reason': llm_result.get('reason'), 'matched_keywords': keyword_list(llm_result.get('matched_keywords'))})
+    return record
+
+class OutputSink:
+    # Single writer thread for every output file. Workers only put records on a queue; the files stay open and are flushed in batches.
+    ROW_BUILDERS = {'unfiltered': lambda job, verdict: unfiltered_row(job), 'filtered': filtered_row, 'llm_log': llm_log_row}
+
+    def __init__(self, fresh, metrics, profiles):
+        self.metrics = metrics
+        self.records = Queue()
+        self.files = {}
+        self.failed_rows, self.last_error = 0, None
+        self.trace_file = open(Config.TRACE_FILE, 'w' if fresh else 'a', encoding='utf-8', buffering=1 << 16) if Config.ENABLE_JOB_TRACES else None
+        for profile in profiles:
+            for kind, (filename, headers) in zip(('filtered', 'unfiltered', 'llm_log'), output_files(profile)):
+                if fresh and os.path.exists(filename): os.remove(filename)
+                write_header = not os.path.exists(filename) or os.path.getsize(filename) == 0
+                csv_file = open(filename, 'a', newline='', encoding='utf-8', buffering=1 << 16)
+                writer = csv.writer(csv_file)
+                if write_header: writer.writerow(headers)
+                jsonl_file = None
+                if Config.WRITE_JSONL_OUTPUT:
+                    jsonl_name = os.path.splitext(filename)[0] + ".jsonl"
+                    jsonl_file = open(jsonl_name, 'w' if fresh else 'a', encoding='utf-8', buffering=1 << 16)
+                self.files[profile.name, kind] = (csv_file, writer, jsonl_file)
+        self.thread = threading.Thread(target=self._writer_loop, name="output-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, kind, job_data, llm_result=None):
+        self.records.put((kind, job_data, llm_result, time.perf_counter()))
+
+    def _writer_loop(self):
+        pending_rows, flush_deadline = 0, time.monotonic() + Config.OUTPUT_FLUSH_SECONDS
+        while True:
+            try: record = self.records.get(timeout=max(0.0, flush_deadline - time.monotonic()))
+            except Empty: record = ()
+            if record is None: break
+            # One bad record (or a failed flush) is counted and reported at close; it must not stop the only writer thread.
+            if record:
+                kind, job_data, llm_result, enqueued_at = record
+                try:
+                    csv_file, writer, jsonl_file = self.files[job_data['profile'], kind]
+                    writer.writerow(self.ROW_BUILDERS[kind](job_data, llm_result))
+                    if jsonl_file: jsonl_file.write(json.dumps(result_record(job_data) if kind == 'unfiltered' else result_record(job_data, llm_result or {})) + "\n")
+                    if self.trace_file and kind == 'llm_log' and (trace := job_data.get('trace')): self._write_trace(job_data, trace)
+                    self.metrics.observe('write_seconds', time.perf_counter() - enqueued_at, output=kind)
+                    pending_rows += 1
+                except Exception as e:
+                    self._record_error(kind, f"{job_data.get('url')}: {e!r}")
+            if pending_rows >= Config.OUTPUT_FLUSH_ROWS or time.monotonic() >= flush_deadline:
+                try:
+                    if pending_rows: self._flush()
+                except OSError as e:
+                    self._record_error('flush', repr(e))
+                pending_rows, flush_deadline = 0, time.monotonic() + Config.OUTPUT_FLUSH_SECONDS
+
+    def _record_error(self, kind, message):
+        self.failed_rows += 1; self.last_error = f"{kind} {message}"
+        self.metrics.increment('output_errors_total', output=kind)
+
+    def _write_trace(self, job_data, trace):
+        trace = dict(trace, written_at=time.time())
+        stages = [stage for stage in ('searched_at', 'found_at', 'queued_at', 'analyzed_at', 'written_at') if stage in trace]
+        spans = {f"{start[:-3]}->{end[:-3]}": round(trace[end] - trace[start], 4) for start, end in zip(stages, stages[1:])}
+        self.trace_file.write(json.dumps({'job_key': job_data.get('job_key'), 'profile': job_data.get('profile'), 'title': job_data.get('title'), 'timestamps': trace, 'spans': spans, 'total_seconds': round(trace['written_at'] - trace[stages[0]], 4)}) + "\n")
+
+    def _flush(self, sync=False):
+        for handles in list(self.files.values()) + [(self.trace_file, None, None)]:
+            for handle in (handles[0], handles[2]):
+                if not handle: continue
+                handle.flush()
+                if sync: os.fsync(handle.fileno())
+
+    def close(self):
+        self.records.put(None); self.thread.join()
+        self._flush(sync=True)
+        for csv_file, writer, jsonl_file in self.files.values():
+            csv_file.close()
+            if jsonl_file: jsonl_file.close()
+        if self.trace_file: self.trace_file.close()
+        if self.failed_rows:
+            print(f"{Fore.RED}[!] {self.failed_rows} output rows could not be written (last error: {self.last_error}). The CSVs are re-exported from the state store at the end of the run.{Style.RESET_ALL}", file=sys.stderr)
+
+def output_files(profile):
+    return [(profile.output_file(Config.FILTERED_OUTPUT_FILE), OUTPUT_HEADERS['filtered']), (profile.output_file(Config.UNFILTERED_OUTPUT_FILE), OUTPUT_HEADERS['unfiltered']),
+            (profile.output_file(Config.LLM_ANALYSIS_LOG_FILE), OUTPUT_HEADERS['llm_log'])]
+
+def export_results(state_store, profiles):
+    for profile in profiles: export_profile_results(state_store, profile)
+
+def export_profile_results(state_store, profile):
+    # Rewrites the profile's three CSVs from the state store, so they hold every job from resumed and incremental runs exactly once.
+    jobs = state_store.iter_jobs(profile.name)
+    matches = sorted(((job, verdict) for job, status, verdict in jobs if verdict and verdict.get('is_match')), key=lambda item: -(item[1].get('score') if isinstance(item[1].get('score'), (int, float)) else 0))
+    rows = {
+        'unfiltered': [unfiltered_row(job) for job, status, verdict in jobs],
+        'llm_log': [llm_log_row(job, verdict) for job, status, verdict in jobs if status != 'pending'],
+        'filtered': [filtered_row(job, verdict) for job, verdict in matches]
+    }
+    for kind, (filename, headers) in zip(('filtered', 'unfiltered', 'llm_log'), output_files(profile)):
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f); writer.writerow(headers); writer.writerows(rows[kind])
+            f.flush(); os.fsync(f.fileno())
+
+    if not Config.WRITE_PARQUET_OUTPUT: return
+    if pq is None:
+        print(f"{Fore.YELLOW}Skipping Parquet export: install pyarrow to enable it.{Style.RESET_ALL}"); return
+    tables = {
+        'unfiltered': [result_record(job) for job, status, verdict in jobs],
+        'llm_log': [result_record(job, verdict or {}) for job, status, verdict in jobs if status != 'pending'],
+        'filtered': [result_record(job, verdict) for job, verdict in matches]
+    }
+    for kind, (filename, headers) in zip(('filtered', 'unfiltered', 'llm_log'), output_files(profile)):
+        if records := tables[kind]: pq.write_table(pa.Table.from_pylist(records), os.path.splitext(filename)[0] + ".parquet")
+
+TRACKING_PARAMS = {"gh_src", "source", "src", "ref", "referrer", "trk", "trackingid", "refid", "lever-source", "lever-origin", "iis", "iisn", "mode", "codes", "utm"}
+
+def _canonical_fallback(parsed):
+    query = sorted((key, value) for key, values in parse_qs(parsed.query).items() for value in values if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_"))
+    host = (parsed.hostname or "").removeprefix("www.")
+    return f"url|{host}{parsed.path.rstrip('/').lower()}" + (f"?{urlencode(query)}" if query else "")
+
+class JobSiteMatcher:
+    # Precompiled matching for result URLs: an allowlist suffix index, ATS detection, company extraction and canonical job keys, all memoized by host.
+    ATS_DOMAINS = {"greenhouse.io": "greenhouse", "lever.co": "lever", "myworkdayjobs.com": "workday", "icims.com": "icims", "workable.com": "workable",
+                   "smartrecruiters.com": "smartrecruiters", "taleo.net": "taleo", "ultipro.com": "ultipro", "bamboohr.com": "bamboohr", "linkedin.com": "linkedin"}
+    NOISE_WORDS = ["Analyst", "Associate", "Hiring", "Careers", "Jobs", "at", "Inc", "LLC", "Ltd", "Partners", "Group", "Holdings", "Job Application for", "Career Opportunities", "Job Search"]
+    NOISE_PATTERN = re.compile(r"\b(?:" + "|".join(re.escape(word) for word in sorted(NOISE_WORDS, key=len, reverse=True)) + r")\b", re.IGNORECASE)
+    TITLE_SPLIT_PATTERN = re.compile(r" - | \| | – ")
+    TITLE_COMPANY_PATTERNS = [re.compile(r"^job application for .+? at (.+?)$", re.IGNORECASE), re.compile(r"^(.+?) hiring ", re.IGNORECASE),
+                              re.compile(r" at (.+?)(?: - | \| | – |$)", re.IGNORECASE)]
+    TITLE_SUFFIX_PATTERN = re.compile(r"\s*(?: - | \| | – )\s*(?:LinkedIn|Workday|Greenhouse|Lever|SmartRecruiters|iCIMS|Workable|Taleo|BambooHR)\s*$", re.IGNORECASE)
+    SUBDOMAIN_PREFIX_PATTERN = re.compile(r"^(?:careers|jobs|uscareers|recruiting)-")
+    GENERIC_SUBDOMAINS = {"www", "boards", "job-boards", "jobs", "apply", "careers", "recruiting", "recruiting2"}
+
+    def __init__(self, target_sites):
+        self.allowlist = {}
+        for site in target_sites:
+            domain, _, path = site.lower().partition('/')
+            self.allowlist.setdefault(domain, []).append('/' + path if path else '')
+        self.resolve_host = lru_cache(maxsize=8192)(self._resolve_host)
+
+    def _resolve_host(self, host):
+        # Returns (allowed path prefixes or None, ats name or None, company name derived from the host or None).
+        labels = host.split('.'); prefixes = ats = None
+        for i in range(len(labels) - 1):
+            suffix = '.'.join(labels[i:])
+            if prefixes is None and suffix in self.allowlist: prefixes = tuple(self.allowlist[suffix])
+            if ats is None and suffix in self.ATS_DOMAINS: ats = self.ATS_DOMAINS[suffix]
+        host_company = None
+        if ats in ("workday", "icims", "taleo", "bamboohr", "workable") and len(labels) > 2:
+            tenant = self.SUBDOMAIN_PREFIX_PATTERN.sub("", labels[0])
+            if tenant not in self.GENERIC_SUBDOMAINS: host_company = self._slug_to_name(tenant)
+        return prefixes, ats, host_company
+
+    @staticmethod
+    def _slug_to_name(slug):
+        return slug.replace('-', ' ').replace('_', ' ').title()
+
+    def match(self, url):
+        # Returns (parsed url, ats, host company) for allowlisted job links, otherwise None.
+        if not url: return None
+        try: parsed = urlparse(url.strip()); host = (parsed.hostname or "").lower()
+        except ValueError: return None  # e.g. "https://[jobs.lever.co/..." raises "Invalid IPv6 URL"
+        if not host: return None
+        prefixes, ats, host_company = self.resolve_host(host)
+        if prefixes is None or not any(parsed.path.lower().startswith(prefix) for prefix in prefixes): return None
+        return parsed, ats, host_company
+
+    def extract_company(self, title, site_match):
+        parsed, ats, host_company = site_match
+        if host_company: return host_company
+        parts = [part for part in parsed.path.split('/') if part]
+        if ats == "greenhouse":
+            if parts and parts[0] not in ('boards', 'jobs', 'embed'): return self._slug_to_name(parts[0])
+            if (company := parse_qs(parsed.query).get('for')): return self._slug_to_name(company[0])
+        if ats in ("lever", "smartrecruiters") and parts and parts[0] not in ('jobs',): return self._slug_to_name(parts[0])
+        if ats == "workable" and parts and parts[0] not in ('j', 'view'): return self._slug_to_name(parts[0])
+        return self.company_from_title(title)
+
+    def company_from_title(self, title):
+        title = self.TITLE_SUFFIX_PATTERN.sub("", title)
+        for pattern in self.TITLE_COMPANY_PATTERNS:
+            if (found := pattern.search(title)) and (company := found.group(1).strip()): return company
+        clean_title = self.NOISE_PATTERN.sub("", title)
+        company = self.TITLE_SPLIT_PATTERN.split(clean_title, 1)[0].strip(); return company if company else None
+
+    def canonical_job_key(self, site_match):
+        # Collapses the many URL variants of one posting (tracking params, gh_jid, /apply suffixes, mirrored LinkedIn hosts...) to 'ats|company|job id'.
+        parsed, ats, host_company = site_match
+        host = (parsed.hostname or "").lower()
+        parts = [part for part in parsed.path.split('/') if part]
+        query = {key.lower(): values[0] for key, values in parse_qs(parsed.query).items()}
+        subdomain = host.split('.')[0]
+        key = None
+        if ats == "greenhouse":
+            if 'gh_jid' in query and parts: key = ("greenhouse", parts[0], query['gh_jid'])
+            elif 'token' in query and 'for' in query: key = ("greenhouse", query['for'], query['token'])
+            elif len(parts) >= 3 and parts[1] == 'jobs': key = ("greenhouse", parts[0], parts[2])
+        elif ats == "lever":
+            if len(parts) >= 2: key = ("lever", parts[0], parts[1])
+        elif ats == "workday":
+            # The id ends the title slug after /job/ or /details/; /apply, /apply/applyManually and similar can follow it.
+            start = max((index + 1 for index, part in enumerate(parts) if part in ('job', 'details')), default=len(parts) - 1)
+            if slug := next((part for part in reversed(parts[start:]) if '_' in part), None): key = ("workday", subdomain, slug.rsplit('_', 1)[1])
+        elif ats == "icims":
+            if len(parts) >= 2 and parts[0] == 'jobs' and parts[1].isdigit(): key = ("icims", self.SUBDOMAIN_PREFIX_PATTERN.sub("", subdomain), parts[1])
+        elif ats == "workable":
+            if 'j' in parts and parts.index('j') + 1 < len(parts): key = ("workable", parts[0] if host == "apply.workable.com" else subdomain, parts[parts.index('j') + 1])
+            elif len(parts) >= 2 and parts[0] == 'view': key = ("workable", "", parts[1])
+        elif ats == "smartrecruiters":
+            if len(parts) >= 2 and (job_id := re.match(r"\d+", parts[1])): key = ("smartrecruiters", parts[0], job_id.group())
+        elif ats == "taleo":
+            if 'job' in query: key = ("taleo", subdomain, query['job'])
+        elif ats == "ultipro":
+            if 'opportunityid' in query and parts: key = ("ultipro", parts[0], query['opportunityid'])
+        elif ats == "bamboohr":
+            if 'id' in query: key = ("bamboohr", subdomain, query['id'])
+            elif len(parts) >= 2 and parts[0] in ('careers', 'jobs') and parts[1].isdigit(): key = ("bamboohr", subdomain, parts[1])
+        elif ats == "linkedin":
+            if 'currentjobid' in query: key = ("linkedin", "", query['currentjobid'])
+            elif len(parts) >= 3 and parts[:2] == ['jobs', 'view'] and (job_id := re.search(r"(\d+)$", parts[2])): key = ("linkedin", "", job_id.group(1))
+        if key: return "|".join(str(part).lower() for part in key)
+        return _canonical_fallback(parsed)
+
+TITLE_SOURCE_SUFFIX_PATTERN = re.compile(r"\s*(?: - | \| | – )\s*(?:linkedin|indeed|glassdoor|workday|greenhouse|lever|smartrecruiters|icims|workable|taleo|bamboohr)\s*$")
+TITLE_HIRING_PATTERN = re.compile(r"^.+? (?:is )?hiring (?:for )?(.+)$")
+TITLE_SEGMENT_PATTERN = re.compile(r" - | \| | – ")
+TITLE_CAREERS_PATTERN = re.compile(r"\b(?:careers?|jobs?|job search|career opportunities)\b")
+
+def bare_job_title(title, company=None):
+    # The role alone, casefolded: "Job Application for X at Acme", "Acme hiring X in New York, NY | LinkedIn" and "X - Acme Careers" all give "x".
+    title = TITLE_SOURCE_SUFFIX_PATTERN.sub("", title.casefold())
+    if hiring := TITLE_HIRING_PATTERN.match(title): title = hiring.group(1).rsplit(" in ", 1)[0]
+    title = title.removeprefix("job application for ").split(" at ", 1)[0]
+    squash = lambda text: re.sub(r"[^\w&]+", "", text)
+    first, *rest = TITLE_SEGMENT_PATTERN.split(title)
+    # Later " - " segments are kept (team, desk, product) unless they only name the company or its careers site.
+    rest = [segment for segment in rest if (core := squash(TITLE_CAREERS_PATTERN.sub("", segment))) and core != squash((company or "").casefold())]
+    return " - ".join([first, *rest]).strip()
+
+class NearDuplicateIndex:
+    # MinHash over character shingles of "title @ company", with LSH banding so each lookup only compares against a handful of candidates.
+    # Board boilerplate is stripped first so cross-posts of one job collapse; country and level (I/II, senior...) must match exactly.
+    NUM_PERMUTATIONS = 64
+    BANDS = 16
+    PRIME = (1 << 61) - 1
+    FILLER_PATTERN = re.compile(r"\b(?:job application for|apply now|remote|hybrid|on-?site|full[- ]time|part[- ]time)\b")
+    LEVEL_PATTERN = re.compile(r"\b(?:i{1,3}|iv|v|[1-5]|senior|sr|junior|jr|lead|principal|staff|intern|entry[- ]level)\b")
+    LEVEL_ALIASES = {"sr": "senior", "jr": "junior", "1": "i", "2": "ii", "3": "iii", "4": "iv", "5": "v"}
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        rng = random.Random(1337)
+        self.permutations = [(rng.randrange(1, self.PRIME), rng.randrange(0, self.PRIME)) for _ in range(self.NUM_PERMUTATIONS)]
+        self.buckets = {}
+        self.signatures = []
+
+    @classmethod
+    def _normalize(cls, title, company):
+        # "Job Application for X at Acme" (Greenhouse) and "Acme hiring X in New York, NY | LinkedIn" both reduce to "x @ acme".
+        title = cls.FILLER_PATTERN.sub(" ", bare_job_title(title, company))
+        title = cls.LEVEL_PATTERN.sub(lambda level: cls.LEVEL_ALIASES.get(level.group(), level.group()), title)
+        return " ".join(re.sub(r"[^\w&+#@]+", " ", f"{title} @ {company.casefold()}").split())
+
+    @classmethod
+    def _scope(cls, text, country):
+        # Part of every LSH bucket key, so "Analyst I" never matches "Analyst II" and one title in two countries stays two jobs.
+        levels = frozenset(cls.LEVEL_PATTERN.findall(text.rsplit(" @ ", 1)[0]))
+        return (country or "").casefold(), levels
+
+    def _signature(self, text):
+        shingles = {text[i:i + 4] for i in range(max(1, len(text) - 3))}
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big') for shingle in shingles]
+        return tuple(min((a * h + b) % self.PRIME for h in hashes) for a, b in self.permutations)
+
+    def add_if_new(self, title, company, country=None):
+        # Returns False (and indexes nothing) if a near-identical title at the same company, country and level was already seen.
+        text = self._normalize(title, company)
+        signature, scope = self._signature(text), self._scope(text, country)
+        rows = self.NUM_PERMUTATIONS // self.BANDS
+        band_keys = [(scope, band, signature[band * rows:(band + 1) * rows]) for band in range(self.BANDS)]
+        with self.lock:
+            candidates = {index for band_key in band_keys for index in self.buckets.get(band_key, ())}
+            for index in candidates:
+                other = self.signatures[index]
+                if sum(1 for a, b in zip(signature, other) if a == b) / self.NUM_PERMUTATIONS >= self.threshold: return False
+            self.signatures.append(signature)
+            for band_key in band_keys: self.buckets.setdefault(band_key, []).append(len(self.signatures) - 1)
+            return True
+
+class RelevanceRanker:
+    # Cheap first stage in front of the LLM: how close is a job title to the target titles in JOB_TITLES and to the resume text?
+    STOPWORDS = {"a", "an", "and", "at", "for", "in", "of", "on", "or", "the", "to", "with", "job", "jobs", "application", "hiring", "careers", "remote", "hybrid", "m", "w", "d", "f"}
+    # Whole words with a few endings folded: finance/financial, researcher/research, analysts/analyst. Nothing is cut to a prefix,
+    # so operator, opera and operations stay three different tokens.
+    SUFFIXES = ("ial", "ers", "er", "es", "s", "e")
+    ALIASES = {"quantitative": "quant", "quants": "quant", "analysis": "analyst", "analytics": "analyst", "analytical": "analyst", "modelling": "modeling"}
+
+    def __init__(self, candidate_summary, job_titles, ollama_client=None, on_fallback=None):
+        self.target_titles = [title for titles in job_titles.values() for title in titles]
+        self.ollama_client = ollama_client if Config.PREFILTER_EMBED_MODEL else None
+        self.on_fallback, self.lock = on_fallback, threading.Lock()
+        resume_lines = [line for line in candidate_summary.splitlines() if self._tokenize(line)]
+        documents = [self._tokenize(text) for text in self.target_titles + resume_lines]
+        document_frequency = {}
+        for tokens in documents:
+            for token in set(tokens): document_frequency[token] = document_frequency.get(token, 0) + 1
+        self.idf = {token: math.log((len(documents) + 1) / (count + 1)) + 1 for token, count in document_frequency.items()}
+        self.unknown_idf = math.log(len(documents) + 1) + 1
+        self.title_vectors = [self._vector(title) for title in self.target_titles]
+        self.resume_terms = set(itertools.chain.from_iterable(self._tokenize(line) for line in resume_lines))
+        if self.ollama_client:
+            try:
+                self.reference_embeddings = self._embed(self.target_titles + [candidate_summary])
+            except Exception as e:
+                print(f"{Fore.YELLOW}Pre-filter embeddings unavailable ({e}), using TF-IDF instead.{Style.RESET_ALL}"); self.ollama_client = None
+
+    def _tokenize(self, text):
+        return [self._stem(token) for token in re.findall(r"[a-z0-9&+#]+", text.casefold()) if token not in self.STOPWORDS]
+
+    def _stem(self, token):
+        if token in self.ALIASES: return self.ALIASES[token]
+        if token.endswith("ies") and len(token) > 5: return token[:-3] + "y"
+        return next((token[:-len(suffix)] for suffix in self.SUFFIXES if token.endswith(suffix) and len(token) - len(suffix) >= 4), token)
+
+    def _vector(self, text):
+        weights = {}
+        for token in self._tokenize(text): weights[token] = weights.get(token, 0.0) + self.idf.get(token, self.unknown_idf)
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        return {token: weight / norm for token, weight in weights.items()}
+
+    def _embed(self, texts):
+        vectors = self.ollama_client.embed(model=Config.PREFILTER_EMBED_MODEL, input=texts)['embeddings']
+        return [[value / (math.sqrt(sum(v * v for v in vector)) or 1.0) for value in vector] for vector in vectors]
+
+    def score(self, title, company=None):
+        # Returns (relevance, threshold for the scorer that produced it): embedding and TF-IDF scores are on different scales.
+        # Only the role is scored; company, location and board text in the result title say nothing about fit.
+        title = bare_job_title(title, company)
+        if ollama_client := self.ollama_client:
+            try:
+                embedding = self._embed([title])[0]
+                return max(sum(a * b for a, b in zip(embedding, reference)) for reference in self.reference_embeddings), Config.PREFILTER_EMBED_MIN_SCORE
+            except Exception as e:
+                # One failed call switches the whole run to TF-IDF, so scores stay comparable with each other from here on.
+                with self.lock:
+                    if self.ollama_client is ollama_client:
+                        self.ollama_client = None
+                        if self.on_fallback: self.on_fallback(e)
+        return self._tfidf_score(title), Config.PREFILTER_MIN_SCORE
+
+    def _tfidf_score(self, title):
+        vector = self._vector(title)
+        if not vector: return 0.0
+        # Cosine times the share of the target title the job covers, so one shared word ("operations") is not half a match.
+        title_similarity = max((sum(weight * target.get(token, 0.0) for token, weight in vector.items()) * sum(target_weight for token, target_weight in target.items() if token in vector) / sum(target.values())
+                                for target in self.title_vectors), default=0.0)
+        resume_coverage = sum(weight for token, weight in vector.items() if token in self.resume_terms) / sum(vector.values())
+        return 0.6 * title_similarity + 0.4 * resume_coverage
+
+class InstanceUnavailable(Exception):
+    pass
+
+class InstanceScheduler:
+    def __init__(self, instances):
+        self.lock = threading.Lock()
+        now = time.monotonic()
+        self.instances = {url: {'latency': None, 'successes': 0, 'failures': 0, 'consecutive_failures': 0, 'cooldown': Config.CIRCUIT_BREAKER_COOLDOWN,
+                                'open_until': 0.0, 'half_open_trial': False, 'tokens': float(Config.INSTANCE_BURST), 'refilled_at': now} for url in instances}
+
+    def _refill(self, stats, now):
+        rate = Config.INSTANCE_REQUESTS_PER_MINUTE / 60.0
+        stats['tokens'] = min(float(Config.INSTANCE_BURST), stats['tokens'] + (now - stats['refilled_at']) * rate); stats['refilled_at'] = now
+
+    def _score(self, stats):
+        success_rate = (stats['successes'] + 1) / (stats['successes'] + stats['failures'] + 2)
+        latency = stats['latency'] if stats['latency'] is not None else 1.0
+        return success_rate / latency * random.uniform(0.8, 1.2)
+
+    def acquire(self, exclude=(), stop_event=None):
+        # Returns the best healthy host with a free token. Waits for a token, or for the earliest open circuit to allow its half-open trial,
+        # so a burst of failures delays pages instead of dropping them. None only if every host is excluded or stop_event is set.
+        while not (stop_event and stop_event.is_set()):
+            with self.lock:
+                now = time.monotonic(); best, best_score, next_ready = None, -1.0, None
+                for url, stats in self.instances.items():
+                    if url in exclude: continue
+                    if stats['open_until'] > now or stats['half_open_trial']:
+                        # A trial in flight settles within one request; check back shortly.
+                        wait = stats['open_until'] - now if stats['open_until'] > now else 1.0
+                        next_ready = wait if next_ready is None else min(next_ready, wait); continue
+                    self._refill(stats, now)
+                    if stats['tokens'] < 1.0:
+                        wait = (1.0 - stats['tokens']) * 60.0 / Config.INSTANCE_REQUESTS_PER_MINUTE
+                        next_ready = wait if next_ready is None else min(next_ready, wait); continue
+                    if (score := self._score(stats)) > best_score: best, best_score = url, score
+                if best:
+                    stats = self.instances[best]; stats['tokens'] -= 1.0
+                    if stats['open_until']: stats['half_open_trial'] = True
+                    return best
+            if next_ready is None: return None
+            if stop_event: stop_event.wait(min(next_ready, 1.0))
+            else: time.sleep(min(next_ready, 1.0))
+        return None
+
+    def record_success(self, url, latency):
+        with self.lock:
+            stats = self.instances[url]
+            stats['latency'] = latency if stats['latency'] is None else 0.7 * stats['latency'] + 0.3 * latency
+            stats['successes'] += 1; stats['consecutive_failures'] = 0
+            stats['open_until'] = 0.0; stats['half_open_trial'] = False; stats['cooldown'] = Config.CIRCUIT_BREAKER_COOLDOWN
+
+    def record_failure(self, url, retry_after=None):
+        with self.lock:
+            stats = self.instances[url]; now = time.monotonic()
+            stats['failures'] += 1; stats['consecutive_failures'] += 1
+            if retry_after is not None or stats['half_open_trial'] or stats['consecutive_failures'] >= Config.CIRCUIT_BREAKER_FAILURES:
+                stats['open_until'] = now + max(stats['cooldown'], retry_after or 0)
+                stats['cooldown'] = min(stats['cooldown'] * 2, Config.CIRCUIT_BREAKER_MAX_COOLDOWN)
+            stats['half_open_trial'] = False
+
+    def summary(self):
+        with self.lock:
+            now = time.monotonic()
+            open_count = sum(1 for stats in self.instances.values() if stats['open_until'] > now)
+            return {'healthy': len(self.instances) - open_count, 'open': open_count}
+
+class ResultPageParser(HTMLParser):
+    # Streaming parser for SearXNG result pages. Builds no tree: it only collects (url, title, snippet) from result containers.
+    # Handles the 'simple' theme (article.result > h3 a, p.content) and the older 'oscar' theme (div.result > h4 a, p.result-content).
+    RESULTS_CONTAINER_IDS = {"urls", "main_results", "results"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.results = []
+        self.is_result_page = False
+        self.container_tag = None; self.container_depth = 0
+        self.in_heading = self.in_snippet = False
+        self.url = None; self.title_parts = []; self.snippet_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if attrs.get('id') in self.RESULTS_CONTAINER_IDS: self.is_result_page = True
+        if self.container_tag:
+            if tag == self.container_tag: self.container_depth += 1
+            elif tag in ('h3', 'h4'): self.in_heading = True
+            elif tag == 'a' and self.in_heading and self.url is None: self.url = attrs.get('href', '')
+            elif tag == 'p' and ('content' in (attrs.get('class') or '').split() or 'result-content' in (attrs.get('class') or '').split()): self.in_snippet = True
+        elif tag in ('article', 'div') and 'result' in (attrs.get('class') or '').split():
+            self.is_result_page = True
+            self.container_tag, self.container_depth = tag, 1
+            self.url = None; self.title_parts = []; self.snippet_parts = []
+
+    def handle_endtag(self, tag):
+        if not self.container_tag: return
+        if tag in ('h3', 'h4'): self.in_heading = False
+        elif tag == 'p': self.in_snippet = False
+        elif tag == self.container_tag:
+            self.container_depth -= 1
+            if self.container_depth == 0:
+                title = " ".join("".join(self.title_parts).split())
+                if self.url and title: self.results.append({"url": self.url, "title": title, "content": " ".join("".join(self.snippet_parts).split())})
+                self.container_tag = None; self.in_heading = self.in_snippet = False
+
+    def handle_data(self, data):
+        if self.in_heading: self.title_parts.append(data)
+        elif self.in_snippet: self.snippet_parts.append(data)
+
+def parse_result_page(html):
+    # Returns a list of {url, title, content} dicts, or None if the page is not a SearXNG result page (bot checks, JS-only pages...).
+    start = min((index for index in (html.find(' id="urls"'), html.find(' id="main_results"'), html.find('class="result')) if index != -1), default=-1)
+    if start == -1: return None
+    end = html.find(' id="pagination"', start)
+    parser = ResultPageParser()
+    parser.feed(html[max(0, html.rfind('<', 0, start)):end if end != -1 else len(html)]); parser.close()
+    return parser.results if parser.is_result_page else None
+
+# Runs the result selector inside Chrome and returns compact JSON, instead of shipping the whole page_source over the WebDriver wire.
+BROWSER_RESULTS_SCRIPT = """
+const containers = document.querySelectorAll('article.result, div.result');
+if (!containers.length && !document.querySelector('#urls, #main_results, #results')) return null;
+const results = [];
+for (const container of containers) {
+    const link = container.querySelector('h3 a, h4 a');
+    const title = link && link.closest('h3, h4').textContent.replace(/\\s+/g, ' ').trim();
+    if (!link || !title) continue;
+    const snippet = container.querySelector('p.content, p.result-content');
+    results.push({url: link.getAttribute('href') || '', title: title, content: snippet ? snippet.textContent.replace(/\\s+/g, ' ').trim() : ''});
+}
+return results;
+"""
+
+class SearxngHttpClient:
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(Config.SEARXNG_INSTANCES), pool_maxsize=Config.MAX_SCRAPER_TABS, max_retries=0)
+        self.session.mount("https://", adapter); self.session.mount("http://", adapter)
+        self.session.headers.update({'User-Agent': Config.HTTP_USER_AGENT, 'Accept-Language': 'en-US,en;q=0.9'})
+        self.lock = threading.Lock()
+        self.html_only_instances = set()
+        self.browser_only_instances = set()
+
+    def fetch_page(self, instance_url, query, page_num):
+        # Returns a list of {url, title, content} dicts, or None when the instance only works in a real browser.
+        if instance_url in self.browser_only_instances: return None
+        search_url = f"{instance_url.strip('/')}/search"
+        params = {'q': query, 'pageno': page_num}
+        if instance_url not in self.html_only_instances:
+            response = self.session.get(search_url, params={**params, 'format': 'json'}, timeout=Config.HTTP_TIMEOUT)
+            if response.status_code == 200 and 'json' in response.headers.get('Content-Type', ''):
+                with self.metrics.timer('parse_seconds', format='json'): data = response.json()
+                if not data.get('results') and data.get('unresponsive_engines'): raise InstanceUnavailable(f"{instance_url} has no responsive engines")
+                return [{"url": r.get('url', ''), "title": (r.get('title') or '').strip(), "content": r.get('content') or ''} for r in data.get('results', [])]
+            # 429 and 5xx are temporary and go to the circuit breaker; anything else (usually 403) means the JSON API is disabled.
+            if response.status_code == 429 or response.status_code >= 500: response.raise_for_status()
+            with self.lock: self.html_only_instances.add(instance_url)
+
+        response = self.session.get(search_url, params=params, timeout=Config.HTTP_TIMEOUT, headers={'Accept': 'text/html'})
+        response.raise_for_status()
+        # Only a 200 that is not a result page (a bot challenge or a JS-only shell) marks the instance as browser-only.
+        with self.metrics.timer('parse_seconds', format='html'): results = parse_result_page(response.text)
+        if results is None:
+            with self.lock: self.browser_only_instances.add(instance_url)
+        return results
+
+    def close(self):
+        self.session.close()
+
+class DriverSession:
+    def __init__(self, driver):
+        self.driver = driver
+        self.page_loads = 0
+        self.crashed = False
+
+class DriverPool:
+    def __init__(self, driver_factory):
+        self.driver_factory = driver_factory
+        self.size = max(1, min(Config.MAX_SCRAPER_TABS, Config.DRIVER_MEMORY_BUDGET_MB // Config.DRIVER_ESTIMATED_MB))
+        self.idle_sessions = Queue()
+        self.lock = threading.Lock()
+        self.live_sessions = 0
+        self.stats = {'created': 0, 'recycled': 0, 'crashed': 0}
+
+    def _create_session(self):
+        with self.lock:
+            if self.live_sessions >= self.size: return None
+            self.live_sessions += 1
+        driver = self.driver_factory()
+        with self.lock:
+            if not driver: self.live_sessions -= 1; return None
+            self.stats['created'] += 1
+        return DriverSession(driver)
+
+    def _is_healthy(self, session):
+        if session.crashed or session.page_loads >= Config.DRIVER_RECYCLE_AFTER_PAGES: return False
+        try:
+            heap_bytes = session.driver.execute_script("return performance.memory ? performance.memory.usedJSHeapSize : 0;") or 0
+            return heap_bytes < Config.DRIVER_MAX_HEAP_MB * 0.8 * 1024 * 1024
+        except Exception:
+            session.crashed = True; return False
+
+    def _discard(self, session):
+        with self.lock:
+            self.live_sessions -= 1
+            self.stats['crashed' if session.crashed else 'recycled'] += 1
+        try: session.driver.quit()
+        except Exception: pass
+
+    def _acquire(self):
+        try: return self.idle_sessions.get_nowait()
+        except Empty: pass
+        while True:
+            session = self._create_session()
+            if session or self.live_sessions == 0: return session
+            try: return self.idle_sessions.get(timeout=1.0)
+            except Empty: continue
+
+    @contextmanager
+    def lease(self):
+        session = self._acquire()
+        if session and not self._is_healthy(session):
+            self._discard(session)
+            session = self._create_session()
+        try:
+            yield session
+        finally:
+            if session:
+                if session.crashed: self._discard(session)
+                else: self.idle_sessions.put(session)
+
+    def close(self):
+        while True:
+            try: session = self.idle_sessions.get_nowait()
+            except Empty: break
+            try: session.driver.quit()
+            except Exception: pass
+
+class LiveJobPipeline:
+    def __init__(self, mode='fresh'):
+        # mode is 'fresh' (start over), 'resume' (continue the last run) or 'incremental' (only new search tasks and URLs).
+        self.mode = mode
+        self.dedup_lock = threading.Lock()
+        self.output_sink = None
         self.processed_links = set()
-        self.search_task_queue = Queue()
-        self.job_analysis_queue = Queue()
+        self.metrics = Metrics()
+        self.job_sites = JobSiteMatcher(Config.TARGET_JOB_SITES)
+        self.near_duplicates = NearDuplicateIndex(Config.NEAR_DUPLICATE_THRESHOLD)
+        self.search_task_queue = PriorityQueue()
+        self.search_sequence = itertools.count()
+        self.active_scrapers = Config.MAX_SCRAPER_TABS
+        self.active_analyzers = Config.MAX_LLM_WORKERS
+        self.analyzer_threads = []
+        self.threads_lock = threading.Lock()
+        self.job_analysis_queue = PriorityQueue()
+        self.job_sequence = itertools.count()
+        self.profiles = configured_profiles()
+        self.profiles_by_name = {profile.name: profile for profile in self.profiles}
+        # (query, country) -> {profile name: tier}. Jobs from a search go to every profile that asked for it, at that profile's tier.
+        self.search_targets = {}
+        for profile in self.profiles:
+            for query, country, tier in profile.search_tasks(): self.search_targets.setdefault((query, country), {})[profile.name] = tier
+        # job key -> (payload, names of the profiles it was sent to), so a posting found again by another profile's search still reaches that profile.
+        self.dispatched_jobs = {}
 
         self.ui_state = {
             'scrapers': {str(i+1): {'status': 'Initializing', 'query': ''} for i in range(Config.MAX_SCRAPER_TABS)},
             'analyzers': {str(i+1): {'status': 'Initializing', 'task': ''} for i in range(Config.MAX_LLM_WORKERS)},
-            'progress': {'searches_left': 0, 'analysis_queue_size': 0, 'matches_found': 0, 'jobs_scraped': 0},
+            'progress': {'searches_left': 0, 'analysis_queue_size': 0, 'matches_found': 0, 'jobs_scraped': 0, 'llm_cache_hits': 0, 'duplicates_skipped': 0},
+            'prefilter': {self._prefilter_key(profile.name, tier): {'passed': 0, 'rejected': 0} for profile in self.profiles for tier in profile.job_titles},
             'recent_events': deque(maxlen=8)
         }
         self.ui_lock = threading.Lock()
         self.stop_event = threading.Event()
+        self.chromedriver_path = None
+        self.driver_setup_lock = threading.Lock()
 
-        self.candidate_summary = self._load_candidate_profile_from_pdf()
-        if not self.candidate_summary:
-            self.driver = None
+        for profile in self.profiles: profile.summary = self._load_candidate_profile_from_pdf(profile)
+        if not all(profile.summary for profile in self.profiles):
+            self.search_client = None
+            self.driver_pool = None
             self.ollama_client = None
+            self.state_store = None
             return
 
-        self.driver = self._setup_driver()
+        self.search_client = SearxngHttpClient(self.metrics)
+        self.instance_scheduler = InstanceScheduler(Config.SEARXNG_INSTANCES)
+        self.driver_pool = DriverPool(self._setup_driver) if Config.ENABLE_BROWSER_FALLBACK else None
         self.ollama_client = self._setup_ollama_client()
-        self._prepare_output_files()
+        for profile in self.profiles:
+            profile.verdict_cache = VerdictCache(profile.output_file(Config.LLM_CACHE_FILE), profile.summary, Config.OLLAMA_MODEL)
+            profile.relevance_ranker = RelevanceRanker(profile.summary, profile.job_titles, self.ollama_client, on_fallback=lambda e: self._update_ui('event', None, None, f"{Fore.YELLOW}[!] Pre-filter embeddings failed ({e}), using TF-IDF for the rest of the run.{Style.RESET_ALL}"))
+        self.state_store = StateStore(Config.STATE_DB_FILE)
 
-    def _load_candidate_profile_from_pdf(self):
+    def _load_candidate_profile_from_pdf(self, profile):
         try:
-            print(f"{Fore.YELLOW}Loading candidate profile from {Config.CANDIDATE_PROFILE_PDF}...{Style.RESET_ALL}")
-            with fitz.open(Config.CANDIDATE_PROFILE_PDF) as doc:
-                text = "".join(page.get_text() for page in doc)
+            print(f"{Fore.YELLOW}Loading candidate profile '{profile.name}' from {profile.pdf}...{Style.RESET_ALL}")
+            text = load_resume_text(profile.pdf)
             print(f"{Fore.GREEN}Successfully loaded and parsed candidate profile.{Style.RESET_ALL}")
             return text
         except Exception as e:
-            print(f"{Fore.RED}FATAL ERROR: Could not read or find '{Config.CANDIDATE_PROFILE_PDF}'.{Style.RESET_ALL}")
+            print(f"{Fore.RED}FATAL ERROR: Could not read or find '{profile.pdf}'.{Style.RESET_ALL}")
             print(f"Please make sure the PDF file exists in the same directory as the script.")
             print(f"Error details: {e}")
             return None
@@ -130,10 +1197,16 @@ class LiveJobPipeline:
         options.add_argument("--window-size=1920,1080")
         options.add_argument("--disable-blink-features=AutomationControlled")
         options.add_argument("--log-level=3")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-gpu")
+        options.add_argument(f"--js-flags=--max-old-space-size={Config.DRIVER_MAX_HEAP_MB}")
         options.add_experimental_option('excludeSwitches', ['enable-logging'])
         try:
-            service = Service(ChromeDriverManager().install())
+            with self.driver_setup_lock:
+                if not self.chromedriver_path: self.chromedriver_path = ChromeDriverManager().install()
+            service = Service(self.chromedriver_path)
             driver = webdriver.Chrome(service=service, options=options)
+            driver.set_page_load_timeout(Config.PAGE_LOAD_TIMEOUT)
             return driver
         except Exception as e:
             print(f"{Fore.RED}Failed to set up Selenium driver: {e}{Style.RESET_ALL}")
@@ -141,43 +1214,36 @@ class LiveJobPipeline:
 
     def _setup_ollama_client(self):
         try:
-            client = ollama.Client(); client.list(); return client
+            client = ollama.Client(host=Config.OLLAMA_HOST); client.list(); return client
         except Exception as e:
             print(f"{Fore.RED}Error: Could not connect to Ollama. Is it running?{Style.RESET_ALL}\n{e}")
             return None
 
-    def _prepare_output_files(self):
-        files_to_prepare = [
-            (Config.FILTERED_OUTPUT_FILE, ["score", "reason", "Job Title", "Company Name", "Source Link", "Country", "Tier", "matched_keywords"]),
-            (Config.UNFILTERED_OUTPUT_FILE, ["Job Title", "Company Name", "Source Link", "Country", "Tier"]),
-            (Config.LLM_ANALYSIS_LOG_FILE, ["is_match", "score", "reason", "matched_keywords", "Job Title", "Company Name", "Source Link", "Country", "Tier"])
-        ]
-        for filename, headers in files_to_prepare:
-            if os.path.exists(filename): os.remove(filename)
-            with self.file_lock:
-                with open(filename, 'w', newline='', encoding='utf-8') as f:
-                    csv.writer(f).writerow(headers)
-
     def _ui_renderer(self):
         while not self.stop_event.is_set():
             output_buffer = []
             with self.ui_lock:
                 output_buffer.append(f"{Style.BRIGHT}{Fore.CYAN}{'='*20} LIVE JOB PIPELINE DASHBOARD {'='*20}{Style.RESET_ALL}")
-                output_buffer.append(f"\n{Style.BRIGHT}--- SCRAPER STATUS ({Config.MAX_SCRAPER_TABS} Browser Tabs) ---{Style.RESET_ALL}")
+                pool_stats = self.driver_pool.stats if self.driver_pool else {'created': 0, 'recycled': 0, 'crashed': 0}
+                instances = self.instance_scheduler.summary()
+                output_buffer.append(f"\n{Style.BRIGHT}--- SCRAPER STATUS ({self.active_scrapers}/{Config.MAX_SCRAPER_TABS} Active Workers | Instances: {instances['healthy']} healthy, {instances['open']} open circuits, {len(self.search_client.browser_only_instances)} JS-only | Chrome: {pool_stats['created']} started, {pool_stats['recycled']} recycled, {pool_stats['crashed']} crashed) ---{Style.RESET_ALL}")
                 for i in range(Config.MAX_SCRAPER_TABS):
                     scraper_id = str(i + 1); status = self.ui_state['scrapers'][scraper_id]['status']; query = self.ui_state['scrapers'][scraper_id]['query']
                     color = Fore.GREEN if "Found" in status else Fore.YELLOW if "Searching" in status else Fore.WHITE
                     output_buffer.append(f"  [{Fore.BLUE}Tab-{scraper_id}{Style.RESET_ALL}]  Status: {color}{status:<20}{Style.RESET_ALL} Query: {query[:70]}")
 
-                output_buffer.append(f"\n{Style.BRIGHT}--- LLM ANALYZER STATUS ({Config.MAX_LLM_WORKERS} Workers) ---{Style.RESET_ALL}")
-                for i in range(Config.MAX_LLM_WORKERS):
-                    worker_id = str(i + 1); status = self.ui_state['analyzers'][worker_id]['status']; task = self.ui_state['analyzers'][worker_id]['task']
+                output_buffer.append(f"\n{Style.BRIGHT}--- LLM ANALYZER STATUS ({self.active_analyzers} Workers) ---{Style.RESET_ALL}")
+                for worker_id in self.ui_state['analyzers']:
+                    status = self.ui_state['analyzers'][worker_id]['status']; task = self.ui_state['analyzers'][worker_id]['task']
                     color = Fore.CYAN if "Analyzing" in status else Fore.WHITE
                     output_buffer.append(f"  [{Fore.MAGENTA}LLM-{worker_id}{Style.RESET_ALL}]      Status: {color}{status:<20}{Style.RESET_ALL} Task:  {task[:70]}")
 
+                prefilter = ", ".join(f"{tier}: {stats['passed']} passed / {stats['rejected']} rejected" for tier, stats in self.ui_state['prefilter'].items())
+                output_buffer.append(f"  Pre-filter  {prefilter}")
+
                 progress = self.ui_state['progress']
                 output_buffer.append(f"\n{Style.BRIGHT}--- OVERALL PROGRESS ---{Style.RESET_ALL}")
-                output_buffer.append(f"  Searches Remaining: {Fore.YELLOW}{progress['searches_left']:<6}{Style.RESET_ALL}| Jobs Scraped: {Fore.WHITE}{progress['jobs_scraped']:<6}{Style.RESET_ALL}| Analysis Queue: {Fore.CYAN}{progress['analysis_queue_size']:<6}{Style.RESET_ALL}| Matches Found: {Fore.GREEN}{progress['matches_found']:<6}{Style.RESET_ALL}")
+                output_buffer.append(f"  Searches Remaining: {Fore.YELLOW}{progress['searches_left']:<6}{Style.RESET_ALL}| Jobs Scraped: {Fore.WHITE}{progress['jobs_scraped']:<6}{Style.RESET_ALL}| Analysis Queue: {Fore.CYAN}{progress['analysis_queue_size']:<6}{Style.RESET_ALL}| Matches Found: {Fore.GREEN}{progress['matches_found']:<6}{Style.RESET_ALL}| Cached Verdicts: {Fore.MAGENTA}{progress['llm_cache_hits']:<6}{Style.RESET_ALL}| Duplicates Skipped: {Fore.WHITE}{progress['duplicates_skipped']:<6}{Style.RESET_ALL}")
 
                 output_buffer.append(f"\n{Style.BRIGHT}--- RECENT EVENTS (LLM Judgements) ---{Style.RESET_ALL}")
                 for event in self.ui_state['recent_events']: output_buffer.append(f"  {event}")
@@ -188,183 +1254,438 @@ class LiveJobPipeline:
     def _update_ui(self, component, id, status, text=""):
         with self.ui_lock:
             if component == 'scraper': self.ui_state['scrapers'][id]['status'] = status; self.ui_state['scrapers'][id]['query'] = text
-            elif component == 'analyzer': self.ui_state['analyzers'][id]['status'] = status; self.ui_state['analyzers'][id]['task'] = text
+            elif component == 'analyzer': self.ui_state['analyzers'][id] = {'status': status, 'task': text}
             elif component == 'event': self.ui_state['recent_events'].appendleft(f"[{time.strftime('%H:%M:%S')}] {text}")
             self.ui_state['progress']['searches_left'] = self.search_task_queue.qsize()
             self.ui_state['progress']['analysis_queue_size'] = self.job_analysis_queue.qsize()
+        self.metrics.set_gauge('queue_depth', self.search_task_queue.qsize(), queue='search')
+        self.metrics.set_gauge('queue_depth', self.job_analysis_queue.qsize(), queue='analysis')
 
-    def scraper_worker(self, tab_handle):
+    def _scraping_finished(self):
+        # Page tasks re-queue their next page before they are marked done, so this only turns true once every query is exhausted.
+        return self.search_task_queue.unfinished_tasks == 0
+
+    def _enqueue_search_task(self, task_data):
+        query, country, tier, page_num = task_data
+        # A search shared by several profiles ranks by the profile that puts its country first.
+        ranks = [profile.country_priority.index(country) for profile in self.profiles if profile.name in self.search_targets.get((query, country), ()) and country in profile.country_priority]
+        country_rank = min(ranks, default=max(len(profile.country_priority) for profile in self.profiles))
+        priority = page_num * Config.PAGE_PRIORITY_WEIGHT + Config.TIER_PRIORITY_WEIGHTS.get(tier, max(Config.TIER_PRIORITY_WEIGHTS.values(), default=0)) + country_rank * Config.COUNTRY_PRIORITY_WEIGHT
+        self.search_task_queue.put((priority, next(self.search_sequence), task_data))
+
+    def _wait_for_capacity(self, tab_name):
+        # Parks this scraper while it is rebalanced out or while the analysis queue is full. Returns False on shutdown.
+        while not self.stop_event.is_set():
+            if int(tab_name) > self.active_scrapers: self._update_ui('scraper', tab_name, 'Paused (rebalanced)')
+            elif self.job_analysis_queue.qsize() >= Config.ANALYSIS_QUEUE_MAX_SIZE: self._update_ui('scraper', tab_name, 'Paused (backpressure)')
+            else: return True
+            time.sleep(1.0)
+        return False
+
+    def scraper_worker(self):
         tab_name = threading.current_thread().name
         self._update_ui('scraper', tab_name, 'Starting...')
-        self.driver.switch_to.window(tab_handle)
-        while not self.search_task_queue.empty() and not self.stop_event.is_set():
-            try: task = self.search_task_queue.get_nowait()
-            except Empty: break
-            self.process_search_query(task, tab_name)
-            self.search_task_queue.task_done()
+        while not self._scraping_finished() and self._wait_for_capacity(tab_name):
+            try: task = self.search_task_queue.get(timeout=1.0)[2]
+            except Empty: continue
+            # The task is marked done whatever happens, or run() would wait on it forever; an unexpected error loses this page, not the worker.
+            try: self.process_search_query(task, tab_name)
+            except Exception as e:
+                self.metrics.increment('search_task_errors_total')
+                self._update_ui('event', None, None, f"{Fore.RED}[!] Tab-{tab_name} dropped page {task[3]} of '{task[0]}' ({task[1]}): {e!r}{Style.RESET_ALL}")
+            finally: self.search_task_queue.task_done()
         self._update_ui('scraper', tab_name, 'Finished')
 
     def process_search_query(self, task_data, tab_name):
-        query, country, tier = task_data
-        self._update_ui('scraper', tab_name, 'Searching...', query)
-        instance_url = random.choice(Config.SEARXNG_INSTANCES)
-        hostname = urlparse(instance_url).hostname
-        for page_num in range(Config.MAX_PAGES_PER_QUERY):
-            if self.stop_event.is_set(): break
+        query, country, tier, page_num = task_data
+        self._update_ui('scraper', tab_name, 'Searching...', f"{query} (page {page_num})")
+        searched_at = time.time()
+        results = self._fetch_search_page(query, page_num, tab_name)
+        if results is None: return
+        if results: self._handle_search_results(results, query, country, tier, tab_name, searched_at)
+        if results and page_num < Config.MAX_PAGES_PER_QUERY:
+            self.state_store.update_task(query, country, page_num + 1)
+            self._enqueue_search_task((query, country, tier, page_num + 1))
+        else:
+            self.state_store.update_task(query, country, Config.MAX_PAGES_PER_QUERY + 1, done=True)
+
+    def _fetch_search_page(self, query, page_num, tab_name):
+        tried_instances = set()
+        for _ in range(Config.MAX_PAGE_ATTEMPTS):
+            instance_url = self.instance_scheduler.acquire(tried_instances, self.stop_event)
+            if not instance_url: break
+            tried_instances.add(instance_url); hostname = urlparse(instance_url).netloc
+            started_at = time.monotonic(); backend = 'http'
             try:
-                if page_num == 0:
-                    search_url = f"{instance_url.strip('/')}/search?q={quote_plus(query)}"
-                    self.driver.get(search_url)
-
-                WebDriverWait(self.driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, "article.result")))
-                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-
-                for result in soup.select("article.result"):
-                    h3_tag = result.find('h3')
-                    if not h3_tag or not (link_tag := h3_tag.find('a')): continue
-                    url, title = link_tag.get('href', ''), h3_tag.get_text(strip=True)
-
-                    with self.file_lock:
-                        if not url or not title or url in self.processed_links or not any(site in url for site in Config.TARGET_JOB_SITES): continue
-                        self.processed_links.add(url)
-
-                    company_name = self._extract_company_name(title, url)
-                    if company_name:
-                        job_payload = {"company": company_name, "title": title, "url": url, "country": country, "tier": tier}
-                        self._save_unfiltered_result(job_payload)
-                        with self.ui_lock: self.ui_state['progress']['jobs_scraped'] += 1
-                        self.job_analysis_queue.put(job_payload)
-                        self._update_ui('scraper', tab_name, f'Found Job ({self.job_analysis_queue.qsize()+1})', title)
-                        self._update_ui('event', None, None, f"{Fore.GREEN}[+] Found:{Style.RESET_ALL} {title}")
-
-                if not self._click_next_page(): break
-                time.sleep(random.uniform(2, 4))
-            except (TimeoutException, WebDriverException):
-                self._update_ui('event', None, None, f"{Fore.YELLOW}[!] Tab-{tab_name} failed on {hostname}.{Style.RESET_ALL}"); break
-
-    def _click_next_page(self):
-        try:
-            next_page_button = self.driver.find_element(By.XPATH, "//button[contains(text(), 'Next page')]")
-            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_page_button)
-            time.sleep(0.5); next_page_button.click(); return True
-        except NoSuchElementException: return False
+                results = self.search_client.fetch_page(instance_url, query, page_num)
+                if results is None: backend = 'browser'; results = self._fetch_page_with_browser(instance_url, query, page_num)
+                if results is None: raise InstanceUnavailable(f"{hostname} needs a browser")
+            except (requests.RequestException, ValueError, WebDriverException, InstanceUnavailable) as e:
+                if (response := getattr(e, 'response', None)) is not None and response.status_code == 429:
+                    retry_after = response.headers.get('Retry-After', '')
+                    self.instance_scheduler.record_failure(instance_url, retry_after=int(retry_after) if retry_after.isdigit() else 0)
+                    self.metrics.increment('searxng_requests_total', host=hostname, outcome='rate_limited')
+                    self._update_ui('event', None, None, f"{Fore.YELLOW}[!] Tab-{tab_name} rate-limited by {hostname}, retrying elsewhere.{Style.RESET_ALL}"); continue
+                self.instance_scheduler.record_failure(instance_url)
+                self.metrics.increment('searxng_requests_total', host=hostname, outcome='failure')
+                self._update_ui('event', None, None, f"{Fore.YELLOW}[!] Tab-{tab_name} failed on {hostname}, retrying elsewhere.{Style.RESET_ALL}"); continue
+            self.instance_scheduler.record_success(instance_url, time.monotonic() - started_at)
+            self.metrics.increment('searxng_requests_total', host=hostname, outcome='success')
+            self.metrics.observe('page_load_seconds', time.monotonic() - started_at, host=hostname, backend=backend)
+            return results
+        if not self.stop_event.is_set():
+            self._update_ui('event', None, None, f"{Fore.RED}[!] Tab-{tab_name} gave up on page {page_num} of {query[:50]}.{Style.RESET_ALL}")
+        return None
 
-    def _extract_company_name(self, title, url):
-        try:
-            parsed_url = urlparse(url); hostname = parsed_url.hostname
-            if not hostname: return None
-            path_parts = parsed_url.path.strip('/').split('/')
-            if 'greenhouse.io' in hostname and len(path_parts) > 0 and path_parts[0] not in ['boards', 'jobs']: return path_parts[0].replace('-', ' ').title()
-            if 'lever.co' in hostname and len(path_parts) > 0 and path_parts[0] not in ['jobs']: return path_parts[0].replace('-', ' ').title()
-        except Exception: pass
-        noise = ["Analyst", "Associate", "Hiring", "Careers", "Jobs", "at", "Inc", "LLC", "Ltd", "Partners", "Group", "Holdings", "Job Application for", "Career Opportunities", "Job Search"]
-        clean_title = title
-        for word in noise: clean_title = re.sub(r'\b' + re.escape(word) + r'\b', '', clean_title, flags=re.IGNORECASE)
-        parts = re.split(r' - | \| | – ', clean_title, 1); company = parts[0].strip(); return company if company else None
+    def _fetch_page_with_browser(self, instance_url, query, page_num):
+        if not self.driver_pool: return None
+        with self.driver_pool.lease() as session:
+            if not session: raise WebDriverException("No browser session available")
+            try:
+                session.driver.get(f"{instance_url.strip('/')}/search?q={quote_plus(query)}&pageno={page_num}"); session.page_loads += 1
+                WebDriverWait(session.driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, "article.result, #urls")))
+                return session.driver.execute_script(BROWSER_RESULTS_SCRIPT)
+            except WebDriverException as e:
+                if not isinstance(e, TimeoutException): session.crashed = True
+                raise
+
+    def _handle_search_results(self, results, query, country, tier, tab_name, searched_at):
+        # Tasks left over from an earlier configuration belong to no profile; their jobs go to every profile.
+        target_profiles = self.search_targets.get((query, country)) or {profile.name: tier for profile in self.profiles}
+        for result in results:
+            url, title = result['url'], result['title']
+
+            dedup_started_at = time.perf_counter()
+            if not title or not (site_match := self.job_sites.match(url)): continue
+            job_key = self.job_sites.canonical_job_key(site_match)
+
+            late_profiles = {}
+            with self.dedup_lock:
+                is_duplicate = url in self.processed_links or job_key in self.processed_links
+                self.processed_links.update((url, job_key))
+                if is_duplicate and job_key in self.dispatched_jobs:
+                    job_payload, sent_to = self.dispatched_jobs[job_key]
+                    late_profiles = {name: profile_tier for name, profile_tier in target_profiles.items() if name not in sent_to}; sent_to.update(late_profiles)
+            self.metrics.observe('dedup_seconds', time.perf_counter() - dedup_started_at)
+            if is_duplicate:
+                if late_profiles: self._dispatch_job(job_payload, late_profiles, tab_name)
+                else:
+                    with self.ui_lock: self.ui_state['progress']['duplicates_skipped'] += 1
+                continue
+            self.state_store.add_seen_urls((url, job_key))
+
+            company_name = self.job_sites.extract_company(title, site_match)
+            if company_name:
+                if not self.near_duplicates.add_if_new(title, company_name, country):
+                    with self.ui_lock: self.ui_state['progress']['duplicates_skipped'] += 1
+                    continue
+                job_payload = {"company": company_name, "title": title, "url": url, "country": country, "job_key": job_key}
+                if Config.ENABLE_JOB_TRACES: job_payload['trace'] = {'searched_at': searched_at, 'found_at': time.time()}
+                self.metrics.increment('jobs_found_total', ats=site_match[1] or 'other')
+                with self.dedup_lock: self.dispatched_jobs[job_key] = (job_payload, set(target_profiles))
+                with self.ui_lock: self.ui_state['progress']['jobs_scraped'] += 1
+                self._dispatch_job(job_payload, target_profiles, tab_name)
+
+    def _dispatch_job(self, job_payload, target_profiles, tab_name):
+        # One copy of the job per profile, with that profile's tier and relevance score.
+        passed = False
+        for profile_name, tier in target_profiles.items():
+            profile = self.profiles_by_name[profile_name]
+            relevance, min_score = profile.relevance_ranker.score(job_payload['title'], job_payload['company'])
+            job_data = dict(job_payload, profile=profile_name, tier=tier, relevance=round(relevance, 4))
+            if 'trace' in job_payload: job_data['trace'] = dict(job_payload['trace'])
+            self.state_store.add_job(job_data)
+            self._save_unfiltered_result(job_data)
+            passed = self._prefilter(job_data, min_score) or passed
+        if passed:
+            self._update_ui('scraper', tab_name, f'Found Job ({self.job_analysis_queue.qsize()})', job_payload['title'])
+            self._update_ui('event', None, None, f"{Fore.GREEN}[+] Found:{Style.RESET_ALL} {job_payload['title']}")
+
+    def _prefilter_key(self, profile_name, tier):
+        return tier if len(self.profiles) == 1 else f"{profile_name} {tier}"
+
+    def _enqueue_job(self, job_data):
+        # Most relevant jobs first; the sequence number keeps equal scores in arrival order.
+        if 'trace' in job_data: job_data['trace'].setdefault('queued_at', time.time())
+        self.job_analysis_queue.put((-job_data.get('relevance', 0.0), next(self.job_sequence), job_data))
+
+    def _prefilter(self, job_data, min_score):
+        passed = job_data['relevance'] >= min_score
+        self.metrics.increment('prefilter_total', profile=job_data['profile'], tier=job_data['tier'], outcome='passed' if passed else 'rejected')
+        with self.ui_lock:
+            tier_stats = self.ui_state['prefilter'].setdefault(self._prefilter_key(job_data['profile'], job_data['tier']), {'passed': 0, 'rejected': 0})
+            tier_stats['passed' if passed else 'rejected'] += 1
+        if passed:
+            self._enqueue_job(job_data); return True
+        verdict = {"is_match": False, "score": 0, "reason": f"Rejected by pre-filter (relevance {job_data['relevance']:.2f} < {min_score})", "matched_keywords": []}
+        if 'trace' in job_data: job_data['trace']['analyzed_at'] = time.time()
+        self.state_store.record_verdict(job_data, verdict)
+        self._save_llm_analysis_log(job_data, verdict)
+        self._update_ui('event', None, None, f"{Fore.WHITE}[x] Pre-filtered ({job_data['relevance']:.2f}):{Style.RESET_ALL} {job_data['title'][:90]}")
+        return False
 
     def llm_analyzer_worker(self):
         worker_id = threading.current_thread().name
         self._update_ui('analyzer', worker_id, 'Idle')
-        while not self.stop_event.is_set():
-            try:
-                job_data = self.job_analysis_queue.get(timeout=1.0)
-            except Empty:
-                if self.search_task_queue.empty():
-                    break
-                continue
+        while not self.stop_event.is_set() and int(worker_id) <= self.active_analyzers:
+            batch = self._collect_llm_batch()
+            if batch is None: break
+            # A prompt carries one resume, so a mixed batch is split per profile.
+            for profile_name in dict.fromkeys(job['profile'] for job in batch):
+                self._analyze_batch(worker_id, [job for job in batch if job['profile'] == profile_name])
+
+        self._update_ui('analyzer', worker_id, 'Finished' if int(worker_id) <= self.active_analyzers else 'Retired')
+
+    def _analyze_batch(self, worker_id, batch):
+        batch = self._claim_uncached_jobs(batch)
+        if not batch: return
 
+        retry_alone = [job for job in batch if job.get('llm_retry_alone')]
+        batchable = [job for job in batch if not job.get('llm_retry_alone')]
+        for job_data in retry_alone:
             self._update_ui('analyzer', worker_id, 'Analyzing Job', job_data['title'][:70])
-            llm_result = self.evaluate_job_with_llm(job_data)
-
-            self._save_llm_analysis_log(job_data, llm_result)
-
-            if llm_result and llm_result.get("is_match"):
-                score = llm_result.get('score', 0)
-                self._update_ui('event', None, None, f"{Fore.CYAN}[✓] Match (Score: {score}/10):{Style.RESET_ALL} {job_data['title']}")
-                with self.ui_lock: self.ui_state['progress']['matches_found'] += 1
-                self._save_filtered_result(job_data, llm_result)
-            elif llm_result:
-                score = llm_result.get('score', 0)
-                self._update_ui('event', None, None, f"{Fore.YELLOW}[-] No Match (Score: {score}/10):{Style.RESET_ALL} {job_data['title'][:90]}")
+            self._finish_llm_job(job_data, self.evaluate_job_with_llm(job_data))
+        if not batchable: return
+
+        self._update_ui('analyzer', worker_id, f'Analyzing {len(batchable)} Jobs', batchable[0]['title'][:70])
+        verdicts = {0: self.evaluate_job_with_llm(batchable[0])} if len(batchable) == 1 else self.evaluate_jobs_with_llm(batchable)
+        for index, job_data in enumerate(batchable):
+            llm_result = verdicts.get(index)
+            if llm_result is None and len(batchable) > 1:
+                job_data['llm_retry_alone'] = True; self._enqueue_job(job_data)
+                self.job_analysis_queue.task_done()
             else:
-                self._update_ui('event', None, None, f"{Fore.RED}[!] LLM Analysis Failed:{Style.RESET_ALL} {job_data['title'][:90]}")
+                self._finish_llm_job(job_data, llm_result)
+
+    def _claim_uncached_jobs(self, batch):
+        # Answers cache hits straight away and parks duplicates of titles already being evaluated. Returns the jobs that need the LLM.
+        to_evaluate = []
+        for job_data in batch:
+            status, verdict = self.profiles_by_name[job_data['profile']].verdict_cache.claim(job_data)
+            if status == 'leader': to_evaluate.append(job_data); continue
+            if status == 'hit':
+                with self.ui_lock: self.ui_state['progress']['llm_cache_hits'] += 1
+                self.metrics.increment('llm_cache_hits_total')
+                self._record_llm_verdict(job_data, verdict)
+                self.job_analysis_queue.task_done()
+        return to_evaluate
 
+    def _finish_llm_job(self, job_data, llm_result):
+        waiting_jobs = self.profiles_by_name[job_data['profile']].verdict_cache.resolve(job_data, llm_result)
+        for job in [job_data] + waiting_jobs:
+            self._record_llm_verdict(job, llm_result)
             self.job_analysis_queue.task_done()
+        if waiting_jobs and llm_result is not None:
+            with self.ui_lock: self.ui_state['progress']['llm_cache_hits'] += len(waiting_jobs)
 
-        self._update_ui('analyzer', worker_id, 'Finished')
+    def _collect_llm_batch(self):
+        # Returns up to LLM_BATCH_SIZE jobs, [] when nothing is queued yet, or None once scraping is done and every queued job is finished.
+        # An empty queue is not enough: a job still in another analyzer's batch can come back as a retry after this worker would have left.
+        try:
+            batch = [self.job_analysis_queue.get(timeout=1.0)[2]]
+        except Empty:
+            return None if self._scraping_finished() and not self.job_analysis_queue.unfinished_tasks else []
+        deadline = time.monotonic() + Config.LLM_BATCH_MAX_WAIT_MS / 1000
+        while len(batch) < Config.LLM_BATCH_SIZE and (remaining := deadline - time.monotonic()) > 0:
+            try: batch.append(self.job_analysis_queue.get(timeout=remaining)[2])
+            except Empty: break
+        return batch
 
-    def evaluate_job_with_llm(self, job_data: dict) -> dict | None:
-        prompt = f"""You are a world-class career coach. Evaluate a single job title for a candidate based on their summary.
+    def _record_llm_verdict(self, job_data, llm_result):
+        if 'trace' in job_data: job_data['trace']['analyzed_at'] = time.time()
+        self.metrics.increment('llm_verdicts_total', profile=job_data['profile'], outcome='match' if llm_result and llm_result.get('is_match') else 'no_match' if llm_result else 'failure')
+        self.state_store.record_verdict(job_data, llm_result)
+        self._save_llm_analysis_log(job_data, llm_result)
+
+        if llm_result and llm_result.get("is_match"):
+            score = llm_result.get('score', 0)
+            self._update_ui('event', None, None, f"{Fore.CYAN}[✓] Match (Score: {score}/10):{Style.RESET_ALL} {job_data['title']}")
+            with self.ui_lock: self.ui_state['progress']['matches_found'] += 1
+            self._save_filtered_result(job_data, llm_result)
+        elif llm_result:
+            score = llm_result.get('score', 0)
+            self._update_ui('event', None, None, f"{Fore.YELLOW}[-] No Match (Score: {score}/10):{Style.RESET_ALL} {job_data['title'][:90]}")
+        else:
+            self._update_ui('event', None, None, f"{Fore.RED}[!] LLM Analysis Failed:{Style.RESET_ALL} {job_data['title'][:90]}")
+
+    def _candidate_prompt_prefix(self, job_data):
+        # Kept identical for single and batched prompts so Ollama can reuse the cached resume prefix between calls.
+        return f"""You are a world-class career coach. Evaluate job titles for a candidate based on their summary.
 CANDIDATE'S SUMMARY:
-{self.candidate_summary}
+{self.profiles_by_name[job_data['profile']].summary}
+"""
+
+    def _chat_with_llm(self, prompt, job_count):
+        mode = 'single' if job_count == 1 else 'batch'
+        started_at = time.perf_counter()
+        try:
+            response = self.ollama_client.chat(model=Config.OLLAMA_MODEL, messages=[{'role': 'user', 'content': prompt}], format='json', options={'temperature': 0.1})
+        except Exception:
+            self.metrics.increment('llm_errors_total', mode=mode); raise
+        finally:
+            self.metrics.observe('llm_seconds', time.perf_counter() - started_at, mode=mode)
+        self.metrics.increment('llm_calls_total', mode=mode); self.metrics.increment('llm_jobs_total', job_count, mode=mode)
+        for field, counter in (('prompt_eval_count', 'llm_prompt_tokens_total'), ('eval_count', 'llm_output_tokens_total')):
+            try: self.metrics.increment(counter, response[field] or 0, mode=mode)
+            except (KeyError, TypeError): pass
+        return json.loads(response['message']['content'])
 
+    def evaluate_job_with_llm(self, job_data: dict) -> dict | None:
+        prompt = f"""{self._candidate_prompt_prefix(job_data)}
 JOB TITLE TO EVALUATE:
 "{job_data['title']}"
 
 Respond ONLY in a valid JSON object with these keys: "is_match" (boolean), "score" (integer 1-10), "reason" (string), "matched_keywords" (list[string])."""
         try:
-            response = self.ollama_client.chat(model=Config.OLLAMA_MODEL, messages=[{'role': 'user', 'content': prompt}], format='json', options={'temperature': 0.1})
-            results = json.loads(response['message']['content'])
-            return results if isinstance(results, dict) else None
+            return validated_verdict(self._chat_with_llm(prompt, job_count=1))
         except Exception as e:
             self._update_ui('event', None, None, f"{Fore.RED}[!] LLM processing error: {e}{Style.RESET_ALL}"); return None
 
+    def evaluate_jobs_with_llm(self, jobs: list) -> dict:
+        # Returns {batch index: verdict} for every job the model answered properly. Missing indexes are retried one at a time.
+        job_lines = "\n".join(f'{index + 1}. "{job["title"]}"' for index, job in enumerate(jobs))
+        prompt = f"""{self._candidate_prompt_prefix(jobs[0])}
+JOB TITLES TO EVALUATE (evaluate each one independently):
+{job_lines}
+
+Respond ONLY in a valid JSON object of the form {{"results": [...]}} with one entry per job title. Each entry must have these keys: "id" (the number of the job title above), "is_match" (boolean), "score" (integer 1-10), "reason" (string), "matched_keywords" (list[string])."""
+        try:
+            results = self._chat_with_llm(prompt, job_count=len(jobs))
+        except Exception as e:
+            self._update_ui('event', None, None, f"{Fore.RED}[!] LLM batch processing error: {e}{Style.RESET_ALL}"); return {}
+
+        if isinstance(results, dict):
+            results = results.get('results', [dict(value, id=key) for key, value in results.items() if isinstance(value, dict)])
+        verdicts = {}
+        for entry in results if isinstance(results, list) else []:
+            if not isinstance(entry, dict) or (verdict := validated_verdict(entry)) is None: continue
+            try: index = int(entry.get('id')) - 1
+            except (TypeError, ValueError): continue
+            if 0 <= index < len(jobs) and index not in verdicts: verdicts[index] = verdict
+        return verdicts
+
     def _save_unfiltered_result(self, job_data):
-        with self.file_lock:
-            with open(Config.UNFILTERED_OUTPUT_FILE, 'a', newline='', encoding='utf-8') as f:
-                csv.writer(f).writerow([job_data.get('title'), job_data.get('company'), job_data.get('url'), job_data.get('country'), job_data.get('tier')])
+        self.output_sink.write('unfiltered', job_data)
 
     def _save_filtered_result(self, job_data, llm_result):
-        with self.file_lock:
-            with open(Config.FILTERED_OUTPUT_FILE, 'a', newline='', encoding='utf-8') as f:
-                csv.writer(f).writerow([llm_result.get('score'), llm_result.get('reason'), job_data.get('title'), job_data.get('company'), job_data.get('url'), job_data.get('country'), job_data.get('tier'), ', '.join(llm_result.get('matched_keywords', []))])
+        self.output_sink.write('filtered', job_data, llm_result)
 
     def _save_llm_analysis_log(self, job_data, llm_result):
-        with self.file_lock:
-            with open(Config.LLM_ANALYSIS_LOG_FILE, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                if llm_result:
-                    writer.writerow([
-                        llm_result.get('is_match', 'ERROR'), llm_result.get('score', 'ERROR'), llm_result.get('reason', 'ERROR'), ', '.join(llm_result.get('matched_keywords', [])),
-                        job_data.get('title'), job_data.get('company'), job_data.get('url'), job_data.get('country'), job_data.get('tier')
-                    ])
-                else:
-                    writer.writerow(['LLM_PROCESS_FAILURE', 'N/A', 'N/A', 'N/A', job_data.get('title'), job_data.get('company'), job_data.get('url'), job_data.get('country'), job_data.get('tier')])
+        self.output_sink.write('llm_log', job_data, llm_result)
+
+    def _metrics_reporter(self):
+        # Periodic JSONL snapshots of every metric, plus the optional Prometheus endpoint.
+        server = None
+        if Config.METRICS_PORT:
+            handler = type('PipelineMetricsHandler', (MetricsRequestHandler,), {'metrics': self.metrics})
+            try:
+                server = ThreadingHTTPServer(('127.0.0.1', Config.METRICS_PORT), handler)
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+            except OSError as e:
+                self._update_ui('event', None, None, f"{Fore.RED}[!] Metrics endpoint unavailable: {e}{Style.RESET_ALL}")
+        while not self.stop_event.wait(Config.METRICS_SNAPSHOT_INTERVAL or 1.0):
+            self._write_metrics_snapshot()
+        if server: server.shutdown()
+
+    def _write_metrics_snapshot(self):
+        if not Config.METRICS_SNAPSHOT_FILE: return
+        self.metrics.set_gauge('queue_depth', self.search_task_queue.qsize(), queue='search')
+        self.metrics.set_gauge('queue_depth', self.job_analysis_queue.qsize(), queue='analysis')
+        self.metrics.set_gauge('active_workers', self.active_scrapers, role='scraper'); self.metrics.set_gauge('active_workers', self.active_analyzers, role='analyzer')
+        with open(Config.METRICS_SNAPSHOT_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.metrics.snapshot()) + "\n")
+
+    def _start_analyzer(self, worker_id):
+        with self.threads_lock:
+            if any(thread.name == str(worker_id) and thread.is_alive() for thread in self.analyzer_threads): return
+            thread = threading.Thread(target=self.llm_analyzer_worker, name=str(worker_id), daemon=True)
+            self.analyzer_threads.append(thread)
+        thread.start()
+
+    def _rebalancer(self):
+        # Shifts concurrency from scraping to analysis while the LLM is the bottleneck, and back once it catches up.
+        while not self.stop_event.wait(Config.REBALANCE_INTERVAL):
+            depth = self.job_analysis_queue.qsize()
+            if depth >= Config.ANALYSIS_QUEUE_HIGH_WATER:
+                self.active_scrapers = max(Config.MIN_ACTIVE_SCRAPERS, self.active_scrapers - 1)
+                if self.active_analyzers < Config.MAX_LLM_WORKERS_CEILING:
+                    self.active_analyzers += 1; self._start_analyzer(self.active_analyzers)
+                    self._update_ui('event', None, None, f"{Fore.MAGENTA}[~] Analysis queue at {depth}: {self.active_scrapers} scrapers, {self.active_analyzers} analyzers.{Style.RESET_ALL}")
+            elif depth <= Config.ANALYSIS_QUEUE_LOW_WATER:
+                self.active_scrapers = min(Config.MAX_SCRAPER_TABS, self.active_scrapers + 1)
+                if self.active_analyzers > Config.MAX_LLM_WORKERS: self.active_analyzers -= 1
+
+    def _load_search_tasks(self):
+        # The union of every profile's searches; a search several profiles share is scheduled at the best of their tiers.
+        tier_weight = lambda tier: Config.TIER_PRIORITY_WEIGHTS.get(tier, max(Config.TIER_PRIORITY_WEIGHTS.values(), default=0))
+        tasks = [(query, country, min(tiers.values(), key=tier_weight)) for (query, country), tiers in self.search_targets.items()]
+        if self.mode == 'fresh': self.state_store.reset()
+        self.state_store.register_tasks(tasks)
+        if self.mode == 'incremental': self.state_store.reopen_stale_tasks(Config.INCREMENTAL_TASK_MAX_AGE_HOURS)
+        if self.mode != 'fresh':
+            self.processed_links = self.state_store.seen_urls()
+            for job_data, status, verdict in self.state_store.iter_jobs():
+                self.near_duplicates.add_if_new(job_data['title'], job_data['company'], job_data.get('country'))
+                if job_key := job_data.get('job_key'): self.dispatched_jobs.setdefault(job_key, (job_data, set()))[1].add(job_data['profile'])
+            for job_data in self.state_store.unfinished_jobs():
+                if job_data['profile'] not in self.profiles_by_name: continue
+                if 'relevance' not in job_data: job_data['relevance'] = round(self.profiles_by_name[job_data['profile']].relevance_ranker.score(job_data['title'], job_data.get('company'))[0], 4)
+                self._enqueue_job(job_data)
+        return self.state_store.pending_tasks()
 
     def run(self):
-        if not self.driver or not self.ollama_client:
+        if not self.search_client or not self.ollama_client:
             print(f"{Fore.RED}Pipeline cannot start due to initialization errors.{Style.RESET_ALL}")
             return
 
         sys.stdout.write("\033[?25l"); sys.stdout.flush()
+        all_threads = []
         try:
-            tasks = [(f'"{title}" "{country}"', country, tier) for tier, titles in Config.JOB_TITLES.items() for title in titles for country in Config.COUNTRY_PRIORITY]
-            random.shuffle(tasks); [self.search_task_queue.put(task) for task in tasks]
-
-            main_window = self.driver.current_window_handle
-            tab_handles = [main_window]
-            for _ in range(Config.MAX_SCRAPER_TABS - 1):
-                self.driver.switch_to.new_window('tab'); tab_handles.append(self.driver.current_window_handle)
+            self.output_sink = OutputSink(fresh=self.mode == 'fresh', metrics=self.metrics, profiles=self.profiles)
+            for task in self._load_search_tasks(): self._enqueue_search_task(task)
 
             ui_thread = threading.Thread(target=self._ui_renderer, daemon=True); ui_thread.start()
 
-            all_threads = []
             for i in range(Config.MAX_SCRAPER_TABS):
-                thread = threading.Thread(target=self.scraper_worker, name=str(i + 1), args=(tab_handles[i],), daemon=True); all_threads.append(thread); thread.start()
-            for i in range(Config.MAX_LLM_WORKERS):
-                thread = threading.Thread(target=self.llm_analyzer_worker, name=str(i + 1), daemon=True); all_threads.append(thread); thread.start()
+                thread = threading.Thread(target=self.scraper_worker, name=str(i + 1), daemon=True); all_threads.append(thread); thread.start()
+            for i in range(Config.MAX_LLM_WORKERS): self._start_analyzer(i + 1)
+            threading.Thread(target=self._rebalancer, daemon=True).start()
+            threading.Thread(target=self._metrics_reporter, daemon=True).start()
 
-            self.search_task_queue.join(); self.job_analysis_queue.join()
+            # Polled rather than Queue.join(), which blocks without a timeout and can hold off Ctrl+C indefinitely.
+            while (self.search_task_queue.unfinished_tasks or self.job_analysis_queue.unfinished_tasks) and not self.stop_event.wait(0.5): pass
             self.stop_event.set()
+            with self.threads_lock: all_threads += self.analyzer_threads
             for t in all_threads: t.join()
             ui_thread.join(timeout=0.5)
         finally:
-            if self.driver: self.driver.quit()
+            self.stop_event.set()
+            # Workers still busy after the grace period find the stores closed and drop their writes; their jobs stay pending for --resume.
+            with self.threads_lock: workers = all_threads + self.analyzer_threads
+            deadline = time.monotonic() + Config.SHUTDOWN_GRACE_SECONDS
+            for t in workers: t.join(timeout=max(0.0, deadline - time.monotonic()))
+            if self.driver_pool: self.driver_pool.close()
+            if self.search_client: self.search_client.close()
+            for profile in self.profiles:
+                if profile.verdict_cache: profile.verdict_cache.close()
+            if self.output_sink: self.output_sink.close()
+            if self.state_store: export_results(self.state_store, self.profiles); self.state_store.close()
+            self._write_metrics_snapshot()
             sys.stdout.write("\033[?25h"); sys.stdout.flush()
 
 if __name__ == "__main__":
     init(autoreset=True)
-    pipeline = LiveJobPipeline()
+    parser = argparse.ArgumentParser(description="Scrape job postings and filter them against your resume with a local LLM.")
+    run_mode = parser.add_mutually_exclusive_group()
+    run_mode.add_argument("--resume", action="store_true", help="Continue the last run from its saved search cursors, seen URLs and pending analyses.")
+    run_mode.add_argument("--incremental", action="store_true", help=f"Skip URLs seen in earlier runs and search tasks finished in the last {Config.INCREMENTAL_TASK_MAX_AGE_HOURS} hours.")
+    run_mode.add_argument("--export", action="store_true", help="Rewrite the CSV files from the state store and exit.")
+    args = parser.parse_args()
+    if args.export:
+        state_store = StateStore(Config.STATE_DB_FILE); export_results(state_store, configured_profiles()); state_store.close()
+        print(f"{Fore.GREEN}Exported results from {Config.STATE_DB_FILE}.{Style.RESET_ALL}"); sys.exit(0)
+
+    pipeline = LiveJobPipeline(mode='resume' if args.resume else 'incremental' if args.incremental else 'fresh')
     try:
         pipeline.run()
     except KeyboardInterrupt:
@@ -377,6 +1698,13 @@ if __name__ == "__main__":
     finally:
         os.system('cls' if os.name == 'nt' else 'clear')
         print(f"\n{Style.BRIGHT}{Fore.CYAN}{'='*26} PIPELINE COMPLETE {'='*26}{Style.RESET_ALL}")
-        print(f"All scraped jobs saved to: {Config.UNFILTERED_OUTPUT_FILE}")
-        print(f"Full LLM analysis log saved to: {Config.LLM_ANALYSIS_LOG_FILE}")
-        print(f"LLM-filtered results saved to: {Config.FILTERED_OUTPUT_FILE}")
+        for profile in pipeline.profiles:
+            if len(pipeline.profiles) > 1: print(f"\n{Style.BRIGHT}Profile '{profile.name}':{Style.RESET_ALL}")
+            print(f"All scraped jobs saved to: {profile.output_file(Config.UNFILTERED_OUTPUT_FILE)}")
+            print(f"Full LLM analysis log saved to: {profile.output_file(Config.LLM_ANALYSIS_LOG_FILE)}")
+            print(f"LLM-filtered results saved to: {profile.output_file(Config.FILTERED_OUTPUT_FILE)}")
+        print()
+        for tier, stats in pipeline.ui_state['prefilter'].items():
+            print(f"Pre-filter {tier}: {stats['passed']} sent to the LLM, {stats['rejected']} rejected")
+        print(f"\n{Style.BRIGHT}--- RUN METRICS ---{Style.RESET_ALL}")
+        for line in pipeline.metrics.summary_lines(): print(line)